@@ -1,15 +1,18 @@
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import gsw
 import matplotlib.dates as mdates
 import matplotlib.gridspec as gridspec
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.io as sio
 from matplotlib.ticker import MultipleLocator
 
 from src import config
+from src.core.datetime_formating import matlab2datetime64
+from src.core.mat_io import load_mat
+from src.core.raster_section import plot_raster_section
+from src.glider_processing.ctd_derived import CTDDerived
 
 # from matplotlib.text import Text
 # from mpl_toolkits.axes_grid1 import make_axes_locatable
@@ -20,62 +23,161 @@ def load_dot_mat_CTD(CTD_data=config.RAW_CTD):
 	:param file_name: .mat file
 	:return: date, cond, depth, lon, lat, pressure, abs_sal, temp arrays
 	"""
-	# Load data from .mat file
-	data = sio.loadmat(CTD_data, squeeze_me = True)  # Squeeze arrays to avoid singletons
+	# Load the first 915 profiles of the variables from .mat file (squeezed to avoid singletons), depth is shared
+	profiles = slice(0, 915)
+	data = load_mat(CTD_data, ['time', 'conductivity', 'depth', 'longitude', 'latitude', 'pressure', 'salinity',
+	                           'temperature'], rows = {'time': profiles, 'conductivity': profiles,
+	                                                   'longitude': profiles, 'latitude': profiles,
+	                                                   'pressure': profiles, 'salinity': profiles,
+	                                                   'temperature': profiles})
 	# Init. clear variables
-	date = data['time'][0:915]
-	cond = data['conductivity'][0:915]
+	date = data['time']
+	cond = data['conductivity']
 	depth = data['depth']
-	lon = data['longitude'][0:915]
-	lat = data['latitude'][0:915]
-	pressure = data['pressure'][0:915]
-	salinity = data['salinity'][0:915]
-	temp = data['temperature'][0:915]
+	lon = data['longitude']
+	lat = data['latitude']
+	pressure = data['pressure']
+	salinity = data['salinity']
+	temp = data['temperature']
 	# Convert to python-readable datetime
-	date = [(datetime(1, 1, 1) + timedelta(days = matlab_date - 367)) for matlab_date in date]
+	date = matlab2datetime64(date).astype('datetime64[us]').tolist()
 
 	return date, cond, depth, lon, lat, pressure, salinity, temp
 
 
+def load_bv_freq(path2ctd=config.RAW_CTD, profiles=slice(0, 915)):
+	"""
+	Reads the bv frequencies of the TEOS-10 N2 of the CTD derived variables (see glider_processing/ctd_derived.py), the
+	bv frequencies shared by all the figures.
+
+	:param path2ctd: path of the CTD .mat file
+	:param profiles: profiles to read (the first 915 by default)
+	:return: date (datetime), depth and n the bv frequencies (profiles x depth - 1)
+	"""
+	with CTDDerived(path2ctd) as ctd:
+		date = ctd.dates()[profiles].astype('datetime64[us]').tolist()
+		depth = ctd.depth
+		n = bv_freq_from_n2(ctd.read('N2', profiles))
+	return date, depth, n
+
+
 def compute_bv_freq(salinity, temp, pressure, lat,date,depth):
 	"""
+	Legacy: see bv_freq, the figures use load_bv_freq.
+
 	:return: X1 (time) and Y1 (depth) as meshgrid and n the bv frequencies over the meshgrid
 	"""
-	n2, p = gsw.Nsquared(salinity.T, temp.T, pressure.T, lat.T)
-	n = np.sqrt(np.abs(n2.T))  # Transpose n2 back and calculate N
-	n[np.isinf(n)] = np.nan
-	# n[n < 0.025] = np.nan # Filter frequencies
+	n = bv_freq(salinity, temp, pressure, lat)
 	# FORMAT DATA FOR PLOTTING
 	X1, Y1 = np.meshgrid(date, depth[0:-1])
 
 	return X1, Y1, n
 
 
-def bv_freq_avg_every_k_meters(n, depth, date, k=5):
+def bv_freq(salinity, temp, pressure, lat):
+	"""
+	Legacy: practical salinity and in-situ temperature are passed as SA and CT. Use load_bv_freq (CTD file) or the N2
+	of ctd_derived.compute_derived (profiles received online) for TEOS-10 bv frequencies.
+
+	:param salinity, temp, pressure: profiles x depth matrices
+	:param lat: latitude of each profile
+	:return: n the bv frequencies (profiles x depth - 1). Each profile is computed independently
+	"""
+	n2, p = gsw.Nsquared(salinity.T, temp.T, pressure.T, lat.T)
+
+	return bv_freq_from_n2(n2.T)  # Transpose n2 back and calculate N
+
+
+def bv_freq_from_n2(n2):
+	"""
+	:param n2: squared bv frequencies (e.g. N2 of the CTD derived variables, see glider_processing/ctd_derived.py)
+	:return: n the bv frequencies, same shape as n2
+	"""
+	n = np.sqrt(np.abs(n2))
+	n[np.isinf(n)] = np.nan
+	# n[n < 0.025] = np.nan # Filter frequencies
+
+	return n
+
+
+def bv_freq_avg_every_k_meters(n, depth, date, k=5, bin_edges=None):
 	"""
 	:param date:
 	:param depth:
 	:param n: bv freq matrix
 	:param k: average every k meters (default = 5)
-
+	:param bin_edges: depth bin edges, overrides k (see bin_depth_average)
+	:return: X2 (time) and Y2 (depth) as meshgrid, bv_mean the averaged bv frequencies (bins x time) and depth_avg the
+	mean depth of each bin
 	"""
-	depth_avg = [[] for _ in range(210 // k)]
-	bv_mean = []
-	for i in range(1, 210, k):
-		n_slice = n[:, i:i + k]  # Create (depth) slices to average
-		n_slice[np.all(np.isnan(n_slice), axis = 1)] = -999  # Attribute an outlier value to elements in full NaN rows
-		bv_mean.append(np.nanmean(n_slice, axis = 1))  # Compute rows mean
-		n_slice[n_slice == -999] = np.nan  # Attribute an outlier value to elements in full NaN rows
-		depth_avg[i // k] = np.nanmean(depth[i:i + k])  # Compute depth mean
-
-	bv_mean = np.array(bv_mean)
-	bv_mean[bv_mean == -999] = np.nan  # Get the outlier mean back to nan
+	bv_mean, depth_avg = bin_depth_average(n, depth, bin_edges = bin_edges, bin_width = k)
 	# FORMAT DATA FOR PLOTTING
 	X2, Y2 = np.meshgrid(date, depth_avg)
 
 	return X2, Y2, bv_mean, depth_avg
 
 
+def bin_depth_average(n, depth, bin_edges=None, bin_width=5):
+	"""
+	NaN-aware mean of the bv frequencies in depth bins, computed for every bin and profile in one pass. n is not
+	modified.
+
+	:param n: bv freq matrix (profiles x depth), column j being at depth[j]
+	:param depth: depth of the columns of n (extra values are ignored)
+	:param bin_edges: depth bin edges. Default (None) uses bins of bin_width meters covering the whole profile, see
+	depth_bin_edges
+	:param bin_width: width of the bins (m) when bin_edges is None
+	:return: bv_mean (bins x profiles), NaN where a bin has no value, and depth_avg the mean depth of each bin. Bins
+	follow the order of depth and bins without any column are dropped
+
+	Note: the default bins differ from the former index-based ones (bv_mean changes for existing callers). Those
+	averaged the columns n[:, i:i + k] for i in range(1, 210, k), i.e. started at the second level and stopped at
+	column 209, whereas the default bins start at depth[0] and cover the whole profile, the last (deepest) bin being
+	partial. The former bins are bin_edges = (depth[0:211:k] + depth[1:212:k]) / 2 (edges between the columns
+	k * j and k * j + 1).
+	"""
+	n = np.asarray(n, dtype = float)
+	col_depth = np.asarray(depth, dtype = float)[:n.shape[1]]
+	# Depth might be negative and decreasing (upward z axis)
+	decreasing = col_depth[-1] < col_depth[0]
+	if bin_edges is None:
+		bin_edges = depth_bin_edges(col_depth, bin_width)
+	bin_edges = np.sort(np.asarray(bin_edges, dtype = float))
+
+	# One-hot matrix (columns x bins) assigning each column to its bin (bins closed on the top side)
+	col_bin = np.digitize(col_depth, bin_edges, right = decreasing) - 1
+	in_bins = (col_bin >= 0) & (col_bin < len(bin_edges) - 1) & ~np.isnan(col_depth)
+	one_hot = np.zeros((len(col_depth), len(bin_edges) - 1))
+	one_hot[np.flatnonzero(in_bins), col_bin[in_bins]] = 1
+
+	# Sums and counts of the non-NaN values of each bin
+	valid = ~np.isnan(n)
+	with np.errstate(invalid = 'ignore', divide = 'ignore'):
+		bv_mean = (np.where(valid, n, 0) @ one_hot) / (valid @ one_hot)
+		depth_avg = (np.where(in_bins, col_depth, 0) @ one_hot) / one_hot.sum(axis = 0)
+
+	# Drop empty bins and keep the order of the depth axis
+	non_empty = one_hot.any(axis = 0)
+	bv_mean, depth_avg = bv_mean[:, non_empty].T, depth_avg[non_empty]
+	if decreasing:
+		bv_mean, depth_avg = bv_mean[::-1], depth_avg[::-1]
+
+	return bv_mean, depth_avg
+
+
+def depth_bin_edges(depth, bin_width=5):
+	"""
+	:param depth: depth axis (increasing or decreasing)
+	:param bin_width: width of the bins (m)
+	:return: edges of bins of bin_width meters starting at the top of the profile (depth[0]) and covering it. With
+	depth = 0, -1, ..., -22 and bin_width = 5: 0, -5, -10, -15, -20, -25, the last bin only holding -20 to -22. Bins
+	are closed on the top side (see bin_depth_average)
+	"""
+	depth = np.asarray(depth, dtype = float)
+	n_bins = np.floor((np.nanmax(depth) - np.nanmin(depth)) / bin_width) + 1
+	return depth[0] + (-1 if depth[-1] < depth[0] else 1) * bin_width * np.arange(n_bins + 1)
+
+
 def bv_sum_top_k_meters(n, k=70):
 	"""
 	:param n: bv freq matrix
@@ -88,8 +190,10 @@ def bv_sum_top_k_meters(n, k=70):
 	return sBV
 
 
-def bvsubplots(date, X1, Y1, n, X2, Y2, bv_mean, sBV):
+def bvsubplots(date, X1, Y1, n, X2, Y2, bv_mean, sBV, render='contourf'):
 	"""
+	:param render: 'contourf' (30 levels) or 'raster' (pcolormesh decimated to the pixel resolution of the axes, much
+	faster on long sections, see plot_raster_section)
 	:return: sets of axes and fig
 	"""
 	n = n.T
@@ -112,7 +216,10 @@ def bvsubplots(date, X1, Y1, n, X2, Y2, bv_mean, sBV):
 			ax.plot(to_plot[-1][0], to_plot[-1][1], '-b', lw = 1)
 		else:
 			# CONTOUR
-			contourf = ax.contourf(to_plot[i][0], to_plot[i][1], to_plot[i][2], 30, cmap = 'jet')
+			if render == 'raster':
+				contourf = plot_raster_section(ax, to_plot[i][0], to_plot[i][1], to_plot[i][2], cmap = 'jet')
+			else:
+				contourf = ax.contourf(to_plot[i][0], to_plot[i][1], to_plot[i][2], 30, cmap = 'jet')
 			# COLORBAR
 			# Create inset axes
 			cbar_ax = ax.inset_axes([1.05, 0.05, 0.03, 0.9], transform = ax.transAxes)  # [left, bottom, width, height]
@@ -189,8 +296,9 @@ def fine_tune_subplots(fig, axes, cbars, max_depth_shown=210):
 
 
 if __name__ == "__main__":
-	date, cond, depth, lon, lat, pressure, salinity, temp = load_dot_mat_CTD()
-	X1, Y1, n = compute_bv_freq(salinity, temp, pressure, lat,date,depth)
+	# N2 is computed once per CTD file (TEOS-10 SA and CT) and read from the derived-variable file
+	date, depth, n = load_bv_freq(config.RAW_CTD)
+	X1, Y1 = np.meshgrid(date, depth[0:-1])
 	X2, Y2, bv_mean, depth_avg = bv_freq_avg_every_k_meters(n, depth, date)
 	sBV = bv_sum_top_k_meters(n, 30)
 	fig, axes, cbars = bvsubplots(date, X1, Y1, n, X2, Y2, bv_mean, sBV)
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+
+from src import config
+from src.BV_ferq.bv_frequencies import bv_freq_from_n2, bin_depth_average, depth_bin_edges, bv_sum_top_k_meters
+from src.core.datetime_formating import matlab2datetime64
+from src.core.mat_io import load_mat
+from src.glider_processing.ctd_derived import compute_derived
+
+# Variables of the CTD file read for each profile
+PROFILE_VARIABLES = ['time', 'longitude', 'latitude', 'pressure', 'salinity', 'temperature']
+# Bump when the computation changes, states saved by a previous version are then recomputed
+STATE_VERSION = 2
+
+
+class OnlineBV:
+	def __init__(self, depth, bin_edges=None, bin_width=5, top_k=70):
+		"""
+		Incremental Brunt-Väisälä computation for profiles received one batch at a time (e.g. glider surfacing).
+		Only the new profiles are computed, the bv frequencies, their depth-binned means and the stratification index
+		(see bv_sum_top_k_meters) of the previous ones are kept.
+
+		:param depth: depth axis of the CTD profiles
+		:param bin_edges: depth bin edges for the averages. Default (None) uses bins of bin_width meters
+		:param bin_width: width of the bins (m) when bin_edges is None
+		:param top_k: stratification index summed over the top_k first meters
+		"""
+		self.depth = np.asarray(depth, dtype = float)
+		if bin_edges is None:
+			bin_edges = depth_bin_edges(self.depth[:-1], bin_width)  # bv frequencies are between depth levels
+		self.bin_edges = np.asarray(bin_edges, dtype = float)
+		self.top_k = top_k
+		self.date = np.array([], dtype = 'datetime64[ns]')
+		self.n = np.empty((0, len(self.depth) - 1))  # profiles x depth - 1
+		self.bv_mean = None  # bins x profiles
+		self.depth_avg = None
+		self.sBV = np.empty(0)
+
+	def append_profiles(self, salinity, temp, pressure, lon, lat, date):
+		"""
+		Computes and appends new profiles. Profiles not after the last one already appended are ignored, so the same
+		feed can be passed again. The bv frequencies come from the same TEOS-10 N2 as the CTD derived variables (see
+		ctd_derived.compute_derived).
+
+		:param salinity, temp, pressure: new profiles x depth matrices (practical salinity, in-situ temperature)
+		:param lon, lat: position of each new profile
+		:param date: date of each new profile
+		:return: number of profiles appended
+		"""
+		date = np.asarray(date, dtype = 'datetime64[ns]')
+		new = date > self.date[-1] if len(self.date) else np.ones(len(date), dtype = bool)
+		if not np.any(new):
+			return 0
+
+		derived = compute_derived(np.atleast_2d(salinity)[new], np.atleast_2d(temp)[new], np.atleast_2d(pressure)[new],
+		                          np.asarray(lon)[new], np.asarray(lat)[new])
+		n = bv_freq_from_n2(derived['N2'])
+		bv_mean, depth_avg = bin_depth_average(n, self.depth, bin_edges = self.bin_edges)
+
+		self.date = np.concatenate([self.date, date[new]])
+		self.n = np.concatenate([self.n, n])
+		self.bv_mean = bv_mean if self.bv_mean is None else np.concatenate([self.bv_mean, bv_mean], axis = 1)
+		self.depth_avg = depth_avg
+		self.sBV = np.concatenate([self.sBV, bv_sum_top_k_meters(n, self.top_k)])
+
+		return np.count_nonzero(new)
+
+	def save(self, path):
+		"""
+		:param path: .npz file where to persist the state
+		"""
+		if os.path.dirname(path):  # Bare file names are saved in the working directory
+			os.makedirs(os.path.dirname(path), exist_ok = True)
+		np.savez_compressed(path, version = STATE_VERSION, depth = self.depth, bin_edges = self.bin_edges, top_k = self.top_k,
+		                    date = self.date.astype(np.int64), n = self.n,
+		                    bv_mean = np.empty((0, 0)) if self.bv_mean is None else self.bv_mean,
+		                    depth_avg = np.empty(0) if self.depth_avg is None else self.depth_avg, sBV = self.sBV)
+
+	@classmethod
+	def load(cls, path):
+		"""
+		:param path: .npz file written by save
+		:return: OnlineBV in the saved state
+		"""
+		with np.load(path) as state:
+			if 'version' not in state or int(state['version']) != STATE_VERSION:
+				raise ValueError(f"'{path}' was saved by another version of OnlineBV")
+			bv = cls(state['depth'], state['bin_edges'], top_k = int(state['top_k']))
+			bv.date = state['date'].astype('datetime64[ns]')
+			bv.n = state['n']
+			if len(bv.date):
+				bv.bv_mean, bv.depth_avg = state['bv_mean'], state['depth_avg']
+			bv.sBV = state['sBV']
+		return bv
+
+	@classmethod
+	def load_or_create(cls, path, depth, **kwargs):
+		"""
+		:return: the state saved in path if it exists (and was saved by this version), a new OnlineBV (see __init__ for
+		kwargs) otherwise
+		"""
+		if os.path.exists(path):
+			try:
+				return cls.load(path)
+			except ValueError:  # Outdated state, recompute all the profiles
+				pass
+		return cls(depth, **kwargs)
+
+
+def read_new_profiles(path2ctd=config.RAW_CTD, start=0):
+	"""
+	Reads the profiles of a CTD file from index start, i.e. all the profiles received after the first start ones (the
+	file is assumed to grow by appending profiles). Unlike load_dot_mat_CTD, the number of profiles is not capped.
+
+	:param path2ctd: path of the CTD .mat file
+	:param start: index of the first profile to read
+	:return: date (datetime64), lon, lat, pressure, salinity, temp (profiles x depth matrices)
+	"""
+	data = load_mat(path2ctd, PROFILE_VARIABLES, rows = slice(start, None))
+	date = matlab2datetime64(np.atleast_1d(data['time']))
+	lon, lat = np.atleast_1d(data['longitude']), np.atleast_1d(data['latitude'])
+	pressure, salinity, temp = (np.atleast_2d(data[name]) for name in ['pressure', 'salinity', 'temperature'])
+	return date, lon, lat, pressure, salinity, temp
+
+
+if __name__ == "__main__":
+	# Feed the profiles not processed yet (all of them on the first run), beyond the 915 of the survey figures
+	depth = load_mat(config.RAW_CTD, ['depth'])['depth']
+	online_bv = OnlineBV.load_or_create(config.BV_ONLINE_STATE, depth, top_k = 30)
+	date, lon, lat, pressure, salinity, temp = read_new_profiles(config.RAW_CTD, len(online_bv.date))
+	n_new = online_bv.append_profiles(salinity, temp, pressure, lon, lat, date)
+	online_bv.save(config.BV_ONLINE_STATE)
+	print(f"{n_new} new profiles, {len(online_bv.date)} profiles in total.")
@@ -1,44 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
-from scipy import signal
-from scipy.signal import filtfilt
+import numpy as np
 
-from src.BV_ferq.bv_frequencies import load_dot_mat_CTD, compute_bv_freq, bv_freq_avg_every_k_meters
+from src.BV_ferq.bv_frequencies import load_bv_freq, bv_freq_avg_every_k_meters
+from src.core.lowpass import lowpass
 
 
-def get_sampling_freq_total_time(signal, time_days):
+def get_sampling_freq_total_time(signal, time):
+	"""
+	:param signal: sampled signal
+	:param time: timestamps of the samples (datetime or datetime64), or the duration of the record in days
+	:return: mean sampling frequency (Hz) and duration of the record (s)
+	"""
 	num_samples = len(signal)
 	# 1. Determine the sampling frequency
-	total_time_seconds = time_days * 24 * 3600  # Total time in seconds
-	sampling_frequency = num_samples / total_time_seconds  # Samples per second
+	if np.ndim(time) == 0:
+		# Duration given in days, assumes a uniform record
+		total_time_seconds = time * 24 * 3600  # Total time in seconds
+		sampling_frequency = num_samples / total_time_seconds  # Samples per second
+	else:
+		# Actual span of the record, samples might not be evenly spaced (mean sampling frequency)
+		time = np.asarray(time, dtype = 'datetime64[ns]')
+		total_time_seconds = (time[-1] - time[0]) / np.timedelta64(1, 's')
+		sampling_frequency = (num_samples - 1) / total_time_seconds  # Samples per second
 	return sampling_frequency, total_time_seconds
 
 
-def get_cutoff_freq_norm(cutoff_freq_h, total_time_seconds):
-	# 2. Design the filter
-	cutoff_frequency_hours = cutoff_freq_h  # Cutoff frequency in hours
-	cutoff_frequency_seconds = cutoff_frequency_hours * 3600  # Cutoff freq in seconds
-	cutoff_frequency_normalized = cutoff_frequency_seconds / (
-			2 * total_time_seconds)  # Normalize frequency (Nyquist = 1)
-	return cutoff_frequency_normalized
+def lowpass_sweep(signals, time, cutoffs_h, orders=(4,), n_workers=None):
+	"""
+	Low-passes the signals for every (order, cutoff) of a parameter grid.
 
+	:param signals: 1D signal or 2D array (signals x time), e.g. [s1, s2] the upper and lower BV boundaries
+	:param time: timestamps of the samples (datetime or datetime64)
+	:param cutoffs_h: cutoff periods (hours), e.g. range(24, 121, 12)
+	:param orders: Butterworth filter orders
+	:param n_workers: if given, the grid is spread over a pool of n_workers processes
+	:return: filtered variants stacked in an array (orders x cutoffs x signals x time)
+	"""
+	signals = np.atleast_2d(np.asarray(signals, dtype = float))
+	sampling_frequency, total_time_seconds = get_sampling_freq_total_time(signals[0], time)
+	grid = [(order, cutoff_h) for order in orders for cutoff_h in cutoffs_h]
+	args = ([signals] * len(grid), [order for order, _ in grid], [cutoff_h for _, cutoff_h in grid],
+	        [sampling_frequency] * len(grid))
 
-def get_lp_butter_lp_filter_param(filter_order, cutoff_frequency_normalized):
-	# Choose filter type and parameters
-	filter_order = filter_order  # Filter order (adjust as needed)
-	b, a = signal.butter(filter_order, cutoff_frequency_normalized, btype = 'low', analog = False)  # Butterworth
-	# b, a = signal.cheby1(filter_order, 0.1, cutoff_frequency_normalized, btype='low', analog=False) #Chebyshev type 1
-	# b, a = signal.bessel(filter_order, cutoff_frequency_normalized, btype='low', analog=False) #Bessel
-	return a, b
+	if n_workers is None:
+		variants = list(map(_lowpass_variant, *args))
+	else:
+		with ProcessPoolExecutor(max_workers = n_workers) as executor:
+			variants = list(executor.map(_lowpass_variant, *args))
 
+	return np.stack(variants).reshape((len(orders), len(cutoffs_h)) + signals.shape)
 
-def lp_filter(a, b, signal):
-	# 3. Apply the filter (using lfilter for no phase delay)
-	filtered_signal = filtfilt(b, a, signal)
-	return filtered_signal
 
+def _lowpass_variant(signals, order, cutoff_h, sampling_frequency):
+	"""
+	Filters all signals at once, the filter design being cached (see src/core/lowpass.py).
+	"""
+	return lowpass(signals, 1 / (cutoff_h * 3600), sampling_frequency, order = order)
 
-# Or use filtfilt for zero-phase filtering (more computationally intensive, but less phase distortion)
-# filtered_values = signal.filtfilt(b, a, values)
 
 def plot_filtering(X, signal, filtered_signal, signal_color,fc_h):
 	# --- Plotting ---
@@ -62,25 +82,33 @@ def plot_filtering(X, signal, filtered_signal, signal_color,fc_h):
 
 if __name__ == "__main__":
 	from src.core.glider_survey_profile import extract_curves
-	date, cond, depth, lon, lat, pressure, salinity, temp = load_dot_mat_CTD()
-	X1, Y1, n = compute_bv_freq(salinity, temp, pressure, lat, date, depth)
+	date, depth, n = load_bv_freq()  # TEOS-10 N2, as the other BV figures
 	X2, Y2, bv_mean, depth_avg = bv_freq_avg_every_k_meters(n, depth, date)
-	upper_boundary, lower_boundary = extract_curves(bv_mean)
+	upper_boundary, lower_boundary, threshold = extract_curves(bv_mean)
 	s1 = [depth_avg[e] for e in upper_boundary]
 	s2 = [depth_avg[e] for e in lower_boundary]
-	del X1, Y1, X2, Y2, n
+	del X2, Y2, n
 
 	fc_h=72
 
 	# s1 and s2 have the same sampling freq and total time
-	sf, length_sec = get_sampling_freq_total_time(s1, 14)
-	fc = get_cutoff_freq_norm(fc_h, length_sec)
-	a, b = get_lp_butter_lp_filter_param(4, fc)
-	s1_f = lp_filter(a, b, s1)
-	s2_f = lp_filter(a, b, s2)
+	sf, length_sec = get_sampling_freq_total_time(s1, date)
+	# Both boundaries filtered in one call (4th order Butterworth, cutoff in Hz, see src/core/lowpass.py), same design
+	# as lowpass_sweep
+	s1_f, s2_f = lowpass([s1, s2], 1 / (fc_h * 3600), sf, order = 4)
 
 	plot_filtering(date, s1, s1_f, "red",fc_h)
 	plot_filtering(date, s2, s2_f, "blue",fc_h)
 
 	plt.tight_layout()
+
+	# Sensitivity to the cutoff and order: (orders x cutoffs x [s1, s2] x time)
+	cutoffs_h = list(range(24, 121, 12))
+	variants = lowpass_sweep([s1, s2], date, cutoffs_h, orders = (2, 4, 6))
+	plt.figure()
+	for j, cutoff_h in enumerate(cutoffs_h):
+		plt.plot(date, variants[1, j, 0], lw = 1, label = f'{cutoff_h}h')
+	plt.title('Upper boundary, 4th order, cutoff sweep')
+	plt.legend()
+
 	plt.show()
\ No newline at end of file
@@ -1,45 +1,87 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.dates import date2num, num2date, DateFormatter
-import scipy.io as sio
+from matplotlib.dates import DateFormatter
 import datetime
 import argparse
 from cmocean import cm as cmo  # for cmocean colormaps
 
-def daily_profiles(data2plot, first_day, last_day, depths, axis=None, cscale=None):
+from src import config
+from src.core.mat_io import load_mat
+from src.core.raster_section import plot_raster_section
+from src.core.time_index import TimeIndex
+
+# data2plot: (variable in data_profiles.mat, colorbar label, colormap)
+SECTION_VARIABLES = {
+    "temperature": ("temperature", "Temperature (°C)", cmo.thermal),
+    "potential temperature": ("cons_temp", "Potential temperature (°C)", cmo.thermal),
+    "density": ("density", "Density (kg/m³)", cmo.dense),
+    "potential density": ("pdens", "Potential density (kg/m³)", cmo.dense),
+    "abs_sal": ("abs_sal", "Salinity (psu)", cmo.haline),
+}
+# Sections rendered for every day by render_daily_sections
+DAILY_SECTION_VARIABLES = ("temperature", "abs_sal", "density")
+
+# Dataset of the current process, reused by every section it renders (see render_sections)
+_renderer = {}
+
+
+def load_profiles(path2profiles=config.RAW_CTD_PROFILES, path2mld=config.RAW_MLD):
     """
-    Plots a profile given start, end, and depths.
+    Loads the gridded CTD profiles and their mixed layer depth once, to draw any number of sections.
 
     Args:
-        data2plot (str): "temperature", "potential temperature", "density",
-                       "potential density", or "abs_sal".
-        first_day (datetime.datetime): Start time limit of the profile.
-        last_day (datetime.datetime): End time limit of the profile.
+        path2profiles (str): Path of data_profiles.mat.
+        path2mld (str): Path of MLD.mat.
+
+    Returns:
+        dict: 'time' (MATLAB datenums), 'time_index' (TimeIndex of the profiles), 'depth', 'MLD' and the variables of
+        SECTION_VARIABLES (profiles x depth).
+    """
+    data = load_mat(path2mld, "MLD", squeeze_me=False)
+    data_profiles = load_mat(path2profiles, ["time", "depth"] + [key for key, _, _ in SECTION_VARIABLES.values()],
+                             squeeze_me=False)
+    time = data_profiles["time"].flatten()  # Flatten time to 1D array
+    profiles = {
+        "time": time,
+        "time_index": TimeIndex.from_matlab(time),  # Sorted datetime64 of the profiles
+        "depth": data_profiles["depth"].flatten(),  # Flatten depth to 1D array
+        "MLD": data["MLD"],
+    }
+    for key, _, _ in SECTION_VARIABLES.values():
+        profiles[key] = data_profiles[key]
+    return profiles
+
+
+def plot_section(ax, profiles, data2plot, first_day, last_day, depths, cscale=None, contour_values=None,
+                 render='contourf'):
+    """
+    Plots a section of profiles (see load_profiles) given start, end, and depths on ax.
+
+    Args:
+        ax (matplotlib.axes.Axes): Axis to plot on.
+        profiles (dict): Dataset returned by load_profiles.
+        data2plot (str): One of SECTION_VARIABLES.
+        first_day (datetime.datetime): Start time limit of the profile (included).
+        last_day (datetime.datetime): End time limit of the profile (included).
         depths (list or tuple): [shallowest, deepest] depth limits.
-        axis (matplotlib.axes._subplots.AxesSubplot, optional): Axis to plot on.
-                                                        If None, creates a new figure.
         cscale (list or tuple, optional): [lowest value, highest value] for color scale.
-                                    Defaults to 'auto'.
-    """
+        contour_values (list, optional): Values of the dashed contours drawn over the section.
+        render (str, optional): 'contourf' (300 levels) or 'raster' (pcolormesh decimated to the pixel resolution of
+                                ax, much faster on long sections, see plot_raster_section).
 
-    # Load data
-    data = sio.loadmat("MLD.mat")
-    MLD = data["MLD"]
-    grad_MLD = data["grad_MLD"]
-
-    data_profiles = sio.loadmat("data_profiles.mat")
-    conductivity = data_profiles["conductivity"]
-    density = data_profiles["density"]
-    depth = data_profiles["depth"].flatten()  # Flatten depth to 1D array
-    latitude = data_profiles["latitude"]
-    longitude = data_profiles["longitude"]
-    pdens = data_profiles["pdens"]
-    ptemp = data_profiles["cons_temp"]
-    salinity = data_profiles["abs_sal"]
-    temperature = data_profiles["temperature"]
-    time = data_profiles["time"].flatten()  # Flatten time to 1D array
+    Returns:
+        tuple: the filled contour set (or mesh) and its colorbar.
 
-    dates = [num2date(t) for t in time]  # Convert datenum to datetime
+    Raises:
+        ValueError: If data2plot is unknown or if there are less than 2 profiles between first_day and last_day.
+    """
+    if data2plot not in SECTION_VARIABLES:
+        raise ValueError(f"Invalid data2plot: {data2plot}")
+    key, colorbar_label, cmap = SECTION_VARIABLES[data2plot]
+    depth = profiles["depth"]
 
     # Find the closest depth indices
     closestIdxmax = np.argmin(np.abs(depth + depths[1]))
@@ -48,51 +90,22 @@ def daily_profiles(data2plot, first_day, last_day, depths, axis=None, cscale=Non
     # Define the new depth array
     s_depth = -depth[closestIdxmin:closestIdxmax + 1]  # Invert depth
 
-    # Find the closest time indices
-    time_diff_start = [abs(d - first_day) for d in dates]
-    idxStart = np.argmin(time_diff_start)
-    time_diff_end = [abs(d - last_day) for d in dates]
-    idxEnd = np.argmin(time_diff_end)
-    s_time = time[idxStart:idxEnd + 1]
-    s_dates = dates[idxStart:idxEnd + 1]  # Corresponding datetime objects
+    # Profiles within [first_day, last_day], in time order (idx: their rows in the dataset)
+    time_index = profiles["time_index"]
+    window = time_index.window(first_day, last_day)
+    idx = time_index.indices(window)
+    if len(idx) < 2:
+        raise ValueError(f"A section needs at least 2 profiles, {len(idx)} between {first_day} and {last_day}")
+    s_dates = time_index.times[window].astype('datetime64[us]').tolist()  # Corresponding datetime objects
 
     # Select data to plot
-    if data2plot == "temperature":
-        s_data = temperature[idxStart:idxEnd + 1, closestIdxmin:closestIdxmax + 1].T
-        s_MLD = MLD[idxStart:idxEnd + 1, :]
-        colorbar_label = "Temperature (°C)"
-        cmap = cmo.thermal
-    elif data2plot == "potential temperature":
-        s_data = ptemp[idxStart:idxEnd + 1, closestIdxmin:closestIdxmax + 1].T
-        s_MLD = MLD[idxStart:idxEnd + 1, :]
-        colorbar_label = "Potential temperature (°C)"
-        cmap = cmo.thermal
-    elif data2plot == "density":
-        s_data = density[idxStart:idxEnd + 1, closestIdxmin:closestIdxmax + 1].T
-        s_MLD = MLD[idxStart:idxEnd + 1, :]
-        colorbar_label = "Density (kg/m³)"  # Changed unit
-        cmap = cmo.dense
-    elif data2plot == "potential density":
-        s_data = pdens[idxStart:idxEnd + 1, closestIdxmin:closestIdxmax + 1].T
-        s_MLD = MLD[idxStart:idxEnd + 1, :]
-        colorbar_label = "Potential density (kg/m³)"  # Changed unit
-        cmap = cmo.dense
-    elif data2plot == "abs_sal":
-        s_data = salinity[idxStart:idxEnd + 1, closestIdxmin:closestIdxmax + 1].T
-        s_MLD = MLD[idxStart:idxEnd + 1, :]
-        colorbar_label = "Salinity (psu)"
-        cmap = cmo.haline
-    else:
-        raise ValueError(f"Invalid data2plot: {data2plot}")
+    s_data = profiles[key][idx, closestIdxmin:closestIdxmax + 1].T
 
-    # Plotting
-    if axis is None:
-        fig, ax = plt.subplots(figsize=(10, 6))  # Create a new figure
+    if render == 'raster':
+        c1 = plot_raster_section(ax, s_dates, s_depth, s_data, cmap=cmap, contour_levels=contour_values)
     else:
-        ax = axis
-
-    c1 = ax.contourf(s_dates, s_depth, s_data, 300, cmap=cmap)  # Use s_dates
-    ax.plot(s_dates, -MLD[idxStart:idxEnd + 1, 0], "k-", linewidth=1)  # Use s_dates
+        c1 = ax.contourf(s_dates, s_depth, s_data, 300, cmap=cmap)  # Use s_dates
+    ax.plot(s_dates, -profiles["MLD"][idx, 0], "k-", linewidth=1)  # Use s_dates
     ax.xaxis.set_major_locator(plt.MaxNLocator(7))
     ax.xaxis.set_major_formatter(DateFormatter('%m/%d %H:%M'))
     plt.setp(ax.get_xticklabels(), rotation=40, ha="right")
@@ -112,25 +125,182 @@ def daily_profiles(data2plot, first_day, last_day, depths, axis=None, cscale=Non
     title_str = f"{data2plot.title()} profile between {s_dates[0].strftime('%d/%m/%Y %H:%M:%S')} and {s_dates[-1].strftime('%d/%m/%Y %H:%M:%S')} within {depths[0]}-{depths[1]} m"
     ax.set_title(title_str)
 
-    # Contour overlay (simplified)
-    contour_values = input("Enter contour values (comma-separated) or press Enter for none: ")
+    # Contour overlay (simplified), already drawn on the decimated grid for raster sections
     if contour_values:
-        contour_values = [float(v.strip()) for v in contour_values.split(",")]
         cbar.set_label(f"{colorbar_label}\nValues for contours: {', '.join(map(str, contour_values))}")
-        ax.contour(s_dates, s_depth, s_data, levels=contour_values, colors='k', linestyles='--')
+        if render != 'raster':
+            ax.contour(s_dates, s_depth, s_data, levels=contour_values, colors='k', linestyles='--')
+
+    return c1, cbar
+
+
+def daily_profiles(data2plot, first_day, last_day, depths, axis=None, cscale=None, contour_values=None,
+                   profiles=None, render='contourf'):
+    """
+    Plots a profile given start, end, and depths.
+
+    Args:
+        data2plot (str): "temperature", "potential temperature", "density",
+                       "potential density", or "abs_sal".
+        first_day (datetime.datetime): Start time limit of the profile.
+        last_day (datetime.datetime): End time limit of the profile.
+        depths (list or tuple): [shallowest, deepest] depth limits.
+        axis (matplotlib.axes._subplots.AxesSubplot, optional): Axis to plot on.
+                                                        If None, creates a new figure.
+        cscale (list or tuple, optional): [lowest value, highest value] for color scale.
+                                    Defaults to 'auto'.
+        contour_values (list, optional): Values of the contours. If None, they are asked interactively.
+        profiles (dict, optional): Dataset returned by load_profiles. Loaded if None.
+        render (str, optional): 'contourf' or 'raster', see plot_section.
+    """
+
+    # Load data
+    if profiles is None:
+        profiles = load_profiles()
+
+    if contour_values is None:
+        contour_values = input("Enter contour values (comma-separated) or press Enter for none: ")
+        contour_values = [float(v.strip()) for v in contour_values.split(",")] if contour_values else []
+
+    # Plotting
+    if axis is None:
+        fig, ax = plt.subplots(figsize=(10, 6))  # Create a new figure
+    else:
+        ax = axis
+
+    plot_section(ax, profiles, data2plot, first_day, last_day, depths, cscale, contour_values, render)
 
     if axis is None:
         plt.show()  # Show the plot if a new figure was created
 
 
+def daily_section_jobs(profiles, variables=DAILY_SECTION_VARIABLES, depths=(0, 200), contour_values=None):
+    """
+    Lists the jobs drawing one section per variable and per day of the profiles. Days without at least 2 profiles
+    (gaps of the mission) have no section.
+
+    Args:
+        profiles (dict): Dataset returned by load_profiles.
+        variables (iterable): data2plot of the sections, see SECTION_VARIABLES.
+        depths (list or tuple): [shallowest, deepest] depth limits of every section.
+        contour_values (dict, optional): Contour values of each variable (no contours by default).
+
+    Returns:
+        list: (data2plot, first_day, last_day, depths, contour_values) jobs for render_sections.
+    """
+    contour_values = contour_values or {}
+    time_index = profiles["time_index"]
+    times = time_index.times
+    days = np.arange(times[0].astype('datetime64[D]'), times[-1].astype('datetime64[D]') + 1)
+    last_days = days + np.timedelta64(1, 'D') - np.timedelta64(1, 's')
+    # Number of profiles of every day at once
+    starts, stops = time_index.windows(days, last_days)
+    days = days[stops - starts >= 2]
+    jobs = []
+    for day in days.astype('datetime64[us]').tolist():
+        last_day = day + datetime.timedelta(hours=23, minutes=59, seconds=59)
+        for data2plot in variables:
+            jobs.append((data2plot, day, last_day, tuple(depths), contour_values.get(data2plot, [])))
+    return jobs
+
+
+def render_sections(jobs, save_dir=config.CTD_SECTIONS, n_workers=None, path2profiles=config.RAW_CTD_PROFILES,
+                    path2mld=config.RAW_MLD, render='contourf'):
+    """
+    Renders and saves sections without any interaction.
+    Each process loads the profile dataset once and draws all its sections with a non-interactive backend. A section
+    that can't be drawn is reported and skipped, the other sections are still rendered.
+
+    Args:
+        jobs (list): (data2plot, first_day, last_day, depths, contour_values) of each section, see daily_section_jobs.
+        save_dir (str): Directory where to save the sections.
+        n_workers (int): Number of processes rendering the sections. Default (None) renders in the current process.
+        path2profiles (str): Path of data_profiles.mat.
+        path2mld (str): Path of MLD.mat.
+        render (str): 'contourf' or 'raster', see plot_section.
+
+    Returns:
+        tuple: Paths of the saved sections and (job, error message) of the failed ones.
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    print(f"Rendering {len(jobs)} sections to '{save_dir}'.")
+
+    if n_workers is None:
+        _init_section_renderer(path2profiles, path2mld, save_dir, render)
+        try:
+            results = [_render_section(job) for job in jobs]
+        finally:
+            _renderer.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_section_renderer,
+                                 initargs=(path2profiles, path2mld, save_dir, render)) as executor:
+            results = list(executor.map(_render_section, jobs))
+
+    paths = [path for path, _ in results if path is not None]
+    failures = [(job, error) for job, (_, error) in zip(jobs, results) if error is not None]
+    for (data2plot, first_day, last_day, _, _), error in failures:
+        print(f"Failed to render the {data2plot} section {first_day} - {last_day}: {error}")
+    return paths, failures
+
+
+def render_daily_sections(variables=DAILY_SECTION_VARIABLES, depths=(0, 200), contour_values=None,
+                          save_dir=config.CTD_SECTIONS, n_workers=None, render='contourf'):
+    """
+    Renders every daily section of the mission for the given variables (see daily_section_jobs and render_sections).
+
+    Returns:
+        tuple: Paths of the saved sections and (job, error message) of the failed ones.
+    """
+    jobs = daily_section_jobs(load_profiles(), variables, depths, contour_values)
+    return render_sections(jobs, save_dir, n_workers, render=render)
+
+
+def _init_section_renderer(path2profiles, path2mld, save_dir, render='contourf'):
+    """
+    Loads the profiles and switches to a non-interactive backend.
+    """
+    plt.switch_backend('Agg')
+    _renderer.update(profiles=load_profiles(path2profiles, path2mld), save_dir=save_dir, render=render)
+
+
+def _render_section(job):
+    """
+    Draws, saves and closes the section of a job.
+
+    Returns:
+        tuple: (path, None) if the section was saved, (None, error message) otherwise.
+    """
+    data2plot, first_day, last_day, depths, contour_values = job
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        plot_section(ax, _renderer['profiles'], data2plot, first_day, last_day, depths,
+                     contour_values=contour_values, render=_renderer['render'])
+        path = os.path.join(_renderer['save_dir'], f"{data2plot.replace(' ', '_')}_{first_day:%Y%m%d_%H%M}_"
+                                                   f"{last_day:%Y%m%d_%H%M}_{depths[0]:g}-{depths[1]:g}m.png")
+        fig.savefig(path, bbox_inches='tight')
+    except Exception as e:  # Reported by render_sections, the other sections are still rendered
+        return None, f"{type(e).__name__}: {e}"
+    finally:
+        plt.close(fig)
+    return path, None
+
+
 if __name__ == '__main__':
     # Example Usage
     parser = argparse.ArgumentParser(description="Plot CTD_WIP profiles")
-    parser.add_argument("data2plot", type=str, choices=["temperature", "potential temperature", "density", "potential density", "abs_sal"], help="Data type to plot")
-    parser.add_argument("first_day", type=lambda s: datetime.datetime.strptime(s, "%d-%b-%Y %H:%M:%S"), help="Start date (e.g., 24-Sep-2022 00:00:00)")
-    parser.add_argument("last_day", type=lambda s: datetime.datetime.strptime(s, "%d-%b-%Y %H:%M:%S"), help="End date (e.g., 24-Sep-2022 23:59:00)")
-    parser.add_argument("depths", type=float, nargs=2, help="Depth limits (e.g., 0 200)")
+    parser.add_argument("data2plot", type=str, nargs="?", choices=list(SECTION_VARIABLES), help="Data type to plot")
+    parser.add_argument("first_day", type=lambda s: datetime.datetime.strptime(s, "%d-%b-%Y %H:%M:%S"), nargs="?", help="Start date (e.g., 24-Sep-2022 00:00:00)")
+    parser.add_argument("last_day", type=lambda s: datetime.datetime.strptime(s, "%d-%b-%Y %H:%M:%S"), nargs="?", help="End date (e.g., 24-Sep-2022 23:59:00)")
+    parser.add_argument("--depths", type=float, nargs=2, default=[0, 200], help="Depth limits (e.g., 0 200)")
     parser.add_argument("--cscale", type=float, nargs=2, help="Color scale limits", default=None)
+    parser.add_argument("--daily", action="store_true", help="Save every daily temperature, salinity and density section of the mission (no interaction)")
+    parser.add_argument("--render", choices=["contourf", "raster"], default="contourf", help="Filled contours or decimated raster (faster)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of processes rendering the daily sections")
     args = parser.parse_args()
 
-    daily_profiles(args.data2plot, args.first_day, args.last_day, args.depths, cscale=args.cscale)
\ No newline at end of file
+    if args.daily:
+        render_daily_sections(depths=args.depths, n_workers=args.workers, render=args.render)
+    elif args.data2plot and args.first_day and args.last_day:
+        daily_profiles(args.data2plot, args.first_day, args.last_day, args.depths, cscale=args.cscale, render=args.render)
+    else:
+        parser.error("data2plot, first_day and last_day are required without --daily")
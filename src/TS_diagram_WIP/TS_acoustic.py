@@ -4,9 +4,11 @@ import numpy as np
 
 from acoustic_remapping_WIP import remap_acoustic_data
 from pot_dens_grid import generate_potential_density_grid
+from ts_binning import binned_ts_statistic, draw_ts_grid, ts_bin_edges
 
 
-def ts_backscatter(ax, time, pressure, latitude, abs_sal, cons_temp, acoustic_data):
+def ts_backscatter(ax, time, pressure, latitude, abs_sal, cons_temp, acoustic_data, render='scatter', s_res=0.01,
+                   t_res=0.05):
 	"""
 	Takes all the following water sampling data along with a set of axis and returns a TS-backscatter diagram
 	including a 'shadow' of the equivalent TS-depth diagram (scatter plot) over the given period of time.
@@ -19,6 +21,10 @@ def ts_backscatter(ax, time, pressure, latitude, abs_sal, cons_temp, acoustic_da
 	:param cons_temp: list of conservative temperature (= TEOS-10 while EOS-80 recommended potential temperature)
 	:param acoustic_data : DataFrame containing acoustic data with time, depth, and acoustic signal
 		columns. Time is expected to be in MATLAB datenum format.
+	:param render: 'scatter' (one marker per sample) or 'binned' (S-T bins drawn as images: occupied bins as the
+	shadow and linear-mean Sv of each bin, rendering time independent of the number of samples)
+	:param s_res: width of the salinity bins (g/kg) when render = 'binned'
+	:param t_res: width of the temperature bins (°C) when render = 'binned'
 	:return: scatter plot with abs_sal (x-axis), temperature (y-axis), density (diagonal), depth of sampling (
 	colorscale)
 	"""
@@ -43,12 +49,22 @@ def ts_backscatter(ax, time, pressure, latitude, abs_sal, cons_temp, acoustic_da
 	# # interest WE ACTUTALLY WANT TO PLOT ALL CTD DATA
 	# scatter = ax.scatter(s[idx_depth], theta[idx_depth], c = -dep[idx_depth], s = 4,cmap = 'jet')
 
-	# TS-depth as a 'shadow'
-	ax.scatter(s, theta, c = 'grey')
-	# Generate the backscatter matrix
-	remapped_acoustic_signal = remap_acoustic_data(acoustic_data,time,dep)
-	#  Plot TS-backscatter
-	scatter_acoustic = ax.scatter(s, theta, c = remapped_acoustic_signal, s = 4, cmap = 'jet')
+	# Remap the backscatter onto each CTD sample (one time per profile, repeated along the profile)
+	sample_time = np.broadcast_to(np.asarray(time, dtype = 'datetime64[ns]')[:, np.newaxis], np.shape(pressure))
+	remapped_acoustic_signal = remap_acoustic_data(acoustic_data, sample_time.flatten(), dep)
+	if render == 'binned':
+		s_edges, t_edges = ts_bin_edges(s, theta, s_res, t_res)
+		# TS-depth as a 'shadow': bins holding CTD samples
+		counts, _, _ = binned_ts_statistic(s, theta, statistic = 'count', s_edges = s_edges, t_edges = t_edges)
+		draw_ts_grid(ax, np.where(counts > 0, 1.0, np.nan), s_edges, t_edges, cmap = 'Greys', vmin = 0, vmax = 2)
+		#  Plot TS-backscatter (mean Sv of each bin, averaged in the linear domain)
+		mean_sv, _, _ = binned_ts_statistic(s, theta, remapped_acoustic_signal, 'linear_mean', s_edges, t_edges)
+		scatter_acoustic = draw_ts_grid(ax, mean_sv, s_edges, t_edges, cmap = 'jet')
+	else:
+		# TS-depth as a 'shadow'
+		ax.scatter(s, theta, c = 'grey')
+		#  Plot TS-backscatter
+		scatter_acoustic = ax.scatter(s, theta, c = remapped_acoustic_signal, s = 4, cmap = 'jet')
 	plt.colorbar(scatter_acoustic, ax = ax, label = 'Backscattering (dB)', orientation = 'vertical',
 	             extend = 'both').ax.invert_yaxis()
 
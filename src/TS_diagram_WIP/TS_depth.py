@@ -2,8 +2,9 @@ import gsw
 import matplotlib.pyplot as plt
 import numpy as np
 from pot_dens_grid import generate_potential_density_grid
+from ts_binning import binned_ts_statistic, draw_ts_grid, ts_bin_edges
 
-def TS_depth(ax, time, pressure, latitude, abs_sal, cons_temp):
+def TS_depth(ax, time, pressure, latitude, abs_sal, cons_temp, render='scatter', s_res=0.01, t_res=0.05):
 	"""
 	Takes all the following water sampling data along with a set of axis and returns a TS-depth diagram (scatter plot)
 	over the given period of time.
@@ -15,8 +16,12 @@ def TS_depth(ax, time, pressure, latitude, abs_sal, cons_temp):
 	:param abs_sal: list of absolute salo,ity values (= TEOS-10 while EOS-80 recommended practical salinity)
 	:param cons_temp: Array of conservative temperature (= TEOS-10 while EOS-80 recommended potential temperature)
 	:param deepest_anchovy: Depth of the deepest anchovy found
-	:return: scatter plot with abs_sal (x-axis), temperature (y-axis), density (diagonal), depth of sampling (
-	colorscale)
+	:param render: 'scatter' (one marker per sample) or 'binned' (median depth of each S-T bin drawn as one image,
+	rendering time independent of the number of samples)
+	:param s_res: width of the salinity bins (g/kg) when render = 'binned'
+	:param t_res: width of the temperature bins (°C) when render = 'binned'
+	:return: scatter plot (or image) with abs_sal (x-axis), temperature (y-axis), density (diagonal), depth of
+	sampling (colorscale)
 	"""
 
 	dep = -gsw.z_from_p(pressure, latitude)  # converting pressure to depth
@@ -38,7 +43,12 @@ def TS_depth(ax, time, pressure, latitude, abs_sal, cons_temp):
 	# idx_depth = np.where(dep > -deepest_anchovy)[0]  # find idx of anchovy above deepest to plot only the data of
 	# # interest WE ACTUTALLY WANT TO PLOT ALL CTD DATA
 	# scatter = ax.scatter(s[idx_depth], theta[idx_depth], c = -dep[idx_depth], s = 4,cmap = 'jet')
-	scatter = ax.scatter(s, theta, c = -dep, s = 4, cmap = 'jet_r')
+	if render == 'binned':
+		s_edges, t_edges = ts_bin_edges(s, theta, s_res, t_res)
+		median_dep, _, _ = binned_ts_statistic(s, theta, -dep, 'median', s_edges, t_edges)
+		scatter = draw_ts_grid(ax, median_dep, s_edges, t_edges, cmap = 'jet_r')
+	else:
+		scatter = ax.scatter(s, theta, c = -dep, s = 4, cmap = 'jet_r')
 	plt.colorbar(scatter, ax = ax, label = 'Depth (m)', orientation = 'vertical')#.ax.invert_yaxis()
 	# set a title
 	ax.set_title(
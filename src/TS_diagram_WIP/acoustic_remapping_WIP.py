@@ -1,9 +1,10 @@
 import numpy as np
 import pandas as pd
-from scipy.interpolate import RegularGridInterpolator
-from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
 
-from src.core.datetime_formating import matlab2python
+from src.core.datetime_formating import matlab2datetime64
+
+REMAPPING_METHODS = ["nearest", "radius", "binned"]
 
 
 def remap_acoustic_data(
@@ -13,36 +14,49 @@ def remap_acoustic_data(
 		time_col: str = "Time",
 		depth_col: str = "Depth_start",
 		acoustic_signal_col: str = "Sv",
-		interpolation_method: str = "linear",
+		method: str = "nearest",
+		time_scale: float = 60.0,
+		depth_scale: float = 1.0,
 ) -> np.ndarray:
 	"""
-	Remaps acoustic backscatter data onto the time/depth grid of a target dataset
+	Remaps acoustic backscatter data onto the samples of a target dataset
 	(e.g., temperature/salinity) for comparison.
 
+	Time and depth are scaled by time_scale and depth_scale so that one unit of the
+	scaled (time, depth) space is the matching distance in both directions. Averages
+	are computed on linear Sv (10 ** (Sv / 10)) and converted back to dB.
+
 	Args:
 		acoustic_data (pd.DataFrame): DataFrame containing acoustic data with
 									 time, depth, and acoustic signal columns.
 									 Time is expected to be in MATLAB datenum format.
-		target_time (np.ndarray): 1D array of time values from the target dataset
-								 (in datetime objects).
-		target_depth (np.ndarray): 1D array of depth values from the target dataset.
+		target_time (np.ndarray): 1D array of the time of each target sample
+								 (datetime objects or datetime64).
+		target_depth (np.ndarray): 1D array of the depth of each target sample,
+								  same length as target_time.
 		time_col (str, optional): Name of the time column in acoustic_data.
 								 Defaults to "Time".
 		depth_col (str, optional): Name of the depth column in acoustic_data.
 								 Defaults to "Depth_start".
 		acoustic_signal_col (str, optional): Name of the acoustic signal column
 											in acoustic_data. Defaults to "Sv".
-		interpolation_method (str, optional): Interpolation method to use.
-											 Defaults to "linear".
+		method (str, optional): "nearest" (closest acoustic sample within one
+							   scaled unit), "radius" (mean of all acoustic samples
+							   within one scaled unit) or "binned" (mean of the
+							   acoustic samples in the same time_scale x depth_scale
+							   cell). Defaults to "nearest".
+		time_scale (float, optional): Time matching distance, in seconds.
+									 Defaults to 60.
+		depth_scale (float, optional): Depth matching distance, in meters.
+									  Defaults to 1.
 
 	Returns:
-		np.ndarray: 1D array of remapped acoustic backscatter values,
-				  interpolated onto the target time/depth grid. NaN values
-				  indicate locations where the target grid has points but
-				  the acoustic data does not have corresponding measurements.
+		np.ndarray: 1D array of remapped acoustic backscatter values (dB), one per
+				  target sample. NaN values indicate target samples without
+				  acoustic measurements within the matching distance.
 
 	Raises:
-		ValueError: If input data is invalid or empty, or if interpolation
+		ValueError: If input data is invalid or empty, or if the remapping
 					method is not supported.
 		TypeError: If input arguments have incorrect types.
 		KeyError: If specified columns are not found in acoustic_data.
@@ -52,104 +66,99 @@ def remap_acoustic_data(
 		raise TypeError("acoustic_data must be a Pandas DataFrame.")
 	if acoustic_data.empty:
 		raise ValueError("acoustic_data cannot be empty.")
-	if not isinstance(target_time, np.ndarray):
-		raise TypeError("target_time must be a NumPy array.")
-	if not isinstance(target_depth, np.ndarray):
-		raise TypeError("target_depth must be a NumPy array.")
+	target_time = np.asarray(target_time, dtype = "datetime64[ns]")
+	target_depth = np.asarray(target_depth, dtype = float)
 	if target_time.ndim != 1:
 		raise ValueError("target_time must be a 1D array.")
 	if target_depth.ndim != 1:
 		raise ValueError("target_depth must be a 1D array.")
-	if not isinstance(time_col, str):
-		raise TypeError("time_col must be a string.")
-	if not isinstance(depth_col, str):
-		raise TypeError("depth_col must be a string.")
-	if not isinstance(acoustic_signal_col, str):
-		raise TypeError("acoustic_signal_col must be a string.")
-	if not isinstance(interpolation_method, str):
-		raise TypeError("interpolation_method must be a string.")
-	if interpolation_method not in ["linear", "nearest"]:
-		raise ValueError(
-			f"Invalid interpolation_method: '{interpolation_method}'. Supported methods are 'linear' and 'nearest'."
-		)
-	if time_col not in acoustic_data.columns:
-		raise KeyError(f"Column '{time_col}' not found in acoustic_data.")
-	if depth_col not in acoustic_data.columns:
-		raise KeyError(f"Column '{depth_col}' not found in acoustic_data.")
-	if acoustic_signal_col not in acoustic_data.columns:
-		raise KeyError(f"Column '{acoustic_signal_col}' not found in acoustic_data.")
-
-	try:
-		# 1. Extract acoustic data and convert time to Python datetime objects
-		acoustic_time_matlab = acoustic_data[time_col].values
-		acoustic_depth = acoustic_data[depth_col].values
-		acoustic_signal = acoustic_data[acoustic_signal_col].values
-		# Convert MATLAB datenum format to Python datetime objects
-		acoustic_time = np.array([matlab2python(t) for t in acoustic_time_matlab])
-
-		# 2. Create a mapping function (interpolator)
-		# Get unique time values from the acoustic data
-		acoustic_time_unique = np.unique(acoustic_time)
-		# Get unique depth values from the acoustic data
-		acoustic_depth_unique = np.unique(acoustic_depth)
-
-		# Find the indices of each acoustic time and depth value in the unique arrays
-		# Subtract 1 to make the indices zero-based
-		time_indices = np.searchsorted(acoustic_time_unique, acoustic_time) - 1
-		depth_indices = np.searchsorted(acoustic_depth_unique, acoustic_depth) - 1
-
-		# --- Sparse Matrix Creation ---
-		# Identify valid indices where both time and depth indices are within the bounds of the unique arrays
-		valid_time_indices = (time_indices >= 0) & (time_indices < len(acoustic_time_unique))
-		valid_depth_indices = (depth_indices >= 0) & (depth_indices < len(acoustic_depth_unique))
-		valid_measurements = valid_time_indices & valid_depth_indices
-
-		# Convert acoustic signal from dB (Sv) to linear scale
-		sparse_data = 10 ** (acoustic_signal[valid_measurements] / 10)
-		# Use the valid indices to create the row and column indices for the sparse matrix
-		sparse_row_indices = time_indices[valid_measurements]
-		sparse_col_indices = depth_indices[valid_measurements]
-
-		# Create a Compressed Sparse Row (CSR) matrix to efficiently store the acoustic data
-		# The shape of the matrix is determined by the number of unique time and depth values
-		acoustic_signal_matrix = csr_matrix(
-			(sparse_data, (sparse_row_indices, sparse_col_indices)),
-			shape = (len(acoustic_time_unique), len(acoustic_depth_unique)),
-		)
-		# --- End Sparse Matrix Creation ---
-
-		# Create a regular grid interpolator
-		# Use the unique time (converted to timestamps) and inverted unique depth as the grid
-		# Invert depth for consistency with oceanographic convention (depth increases downwards)
-		interpolator = RegularGridInterpolator(
-			([d.timestamp() for d in acoustic_time_unique], -acoustic_depth_unique),
-			acoustic_signal_matrix,
-			method = interpolation_method,
-			bounds_error = False,
-			# Use NaN for points outside the input data's convex hull
-			fill_value = np.nan,
-		)
-
-		# 3. Generate target grid coordinates
-		# Create a meshgrid from the target time and inverted target depth arrays
-		# Invert depth for consistency with oceanographic convention
-		target_time_grid, target_depth_grid = np.meshgrid(target_time, -target_depth)
-		# Stack the time and depth grids to create the points at which to interpolate
-		target_points = np.stack((target_time_grid, target_depth_grid), axis = -1)
-
-		# 4. Remap acoustic data onto the target grid using the interpolator
-		remapped_acoustic_signal = interpolator(target_points).flatten()
-
-		# 5. Convert the remapped acoustic signal back to dB (Sv)
-		# Apply the conversion only to non-zero values to avoid log(0) errors
-		remapped_acoustic_signal[remapped_acoustic_signal != 0] = 10 * np.log10(
-			remapped_acoustic_signal[remapped_acoustic_signal != 0]
-		)
-		# Set zero values to NaN, as they represent no signal in the linear scale
-		remapped_acoustic_signal[remapped_acoustic_signal == 0] = np.nan
-
-		return remapped_acoustic_signal
-
-	except Exception as e:
-		# Raise a general exception if any error occurs during the process
-		raise Exception(f"An unexpected error occurred during the remapping process: {e}")
\ No newline at end of file
+	if len(target_time) != len(target_depth):
+		raise ValueError("target_time and target_depth must have the same length.")
+	if method not in REMAPPING_METHODS:
+		raise ValueError(f"Invalid method: '{method}'. Supported methods are {REMAPPING_METHODS}.")
+	if time_scale <= 0 or depth_scale <= 0:
+		raise ValueError("time_scale and depth_scale must be positive.")
+	for col in (time_col, depth_col, acoustic_signal_col):
+		if col not in acoustic_data.columns:
+			raise KeyError(f"Column '{col}' not found in acoustic_data.")
+
+	# 1. Acoustic and target samples in the scaled (time, depth) space
+	acoustic_points = np.column_stack((
+		_to_seconds(matlab2datetime64(acoustic_data[time_col].to_numpy())) / time_scale,
+		acoustic_data[depth_col].to_numpy(dtype = float) / depth_scale,
+	))
+	# Convert acoustic signal from dB (Sv) to linear scale
+	acoustic_linear = 10 ** (acoustic_data[acoustic_signal_col].to_numpy(dtype = float) / 10)
+	valid = np.isfinite(acoustic_points).all(axis = 1) & np.isfinite(acoustic_linear)
+	acoustic_points, acoustic_linear = acoustic_points[valid], acoustic_linear[valid]
+
+	target_points = np.column_stack((_to_seconds(target_time) / time_scale, target_depth / depth_scale))
+	target_valid = np.isfinite(target_points).all(axis = 1)
+
+	# 2. Remap (linear scale) onto the valid target samples
+	remapped_linear = np.full(len(target_points), np.nan)
+	if acoustic_points.size and target_valid.any():
+		remapped_linear[target_valid] = _REMAPPERS[method](acoustic_points, acoustic_linear,
+		                                                   target_points[target_valid])
+
+	# 3. Convert the remapped acoustic signal back to dB (Sv), zero/empty values are set to NaN
+	remapped_acoustic_signal = np.full_like(remapped_linear, np.nan)
+	positive = remapped_linear > 0
+	remapped_acoustic_signal[positive] = 10 * np.log10(remapped_linear[positive])
+
+	return remapped_acoustic_signal
+
+
+def _to_seconds(time):
+	"""
+	Converts a datetime64 array to float seconds since 1970-01-01 (NaT to NaN).
+	"""
+	time = np.asarray(time, dtype = "datetime64[ns]")
+	seconds = time.astype(np.int64) / 1e9
+	seconds[np.isnat(time)] = np.nan
+	return seconds
+
+
+def _remap_nearest(points, values, targets):
+	"""
+	Value of the closest acoustic sample within one scaled unit of each target (NaN if none).
+	"""
+	distances, indices = cKDTree(points).query(targets, k = 1, distance_upper_bound = 1.0)
+	found = np.isfinite(distances)
+	remapped = np.full(len(targets), np.nan)
+	remapped[found] = values[indices[found]]
+	return remapped
+
+
+def _remap_radius(points, values, targets):
+	"""
+	Mean value of the acoustic samples within one scaled unit of each target (NaN if none).
+	"""
+	pairs = cKDTree(targets).sparse_distance_matrix(cKDTree(points), max_distance = 1.0, output_type = "ndarray")
+	sums = np.bincount(pairs["i"], weights = values[pairs["j"]], minlength = len(targets))
+	counts = np.bincount(pairs["i"], minlength = len(targets))
+	with np.errstate(invalid = "ignore", divide = "ignore"):
+		return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _remap_binned(points, values, targets):
+	"""
+	Mean value of the acoustic samples falling in the same unit cell of the scaled space as each target (NaN if none).
+	"""
+	origin = np.minimum(points.min(axis = 0), targets.min(axis = 0))
+	acoustic_cells = np.floor(points - origin).astype(np.int64)
+	target_cells = np.floor(targets - origin).astype(np.int64)
+	n_depth_cells = max(acoustic_cells[:, 1].max(), target_cells[:, 1].max()) + 1
+	acoustic_keys = acoustic_cells[:, 0] * n_depth_cells + acoustic_cells[:, 1]
+	target_keys = target_cells[:, 0] * n_depth_cells + target_cells[:, 1]
+
+	# Mean of each occupied cell
+	keys, inverse = np.unique(acoustic_keys, return_inverse = True)
+	means = np.bincount(inverse, weights = values) / np.bincount(inverse)
+
+	# Look up the cell of each target
+	positions = np.minimum(np.searchsorted(keys, target_keys), len(keys) - 1)
+	return np.where(keys[positions] == target_keys, means[positions], np.nan)
+
+
+_REMAPPERS = {"nearest": _remap_nearest, "radius": _remap_radius, "binned": _remap_binned}
@@ -1,13 +1,13 @@
-import numpy as np
 from datetime import datetime
-import bisect
+
+from src.core.time_index import TimeIndex
 
 def find_time_indices(time, t1, t2):
     """
-    Efficiently finds the indices in a sorted list of datetime objects.
+    Efficiently finds the indices in a sorted list (or array) of datetime objects (see TimeIndex).
 
     Args:
-        time: A sorted list of datetime.datetime objects.
+        time: A sorted list of datetime.datetime objects (or datetime64 array).
         t1: The start datetime (datetime.datetime).
         t2: The end datetime (datetime.datetime).
 
@@ -19,14 +19,13 @@ def find_time_indices(time, t1, t2):
             Returns len(time) if all elements are <= t2 or -1 if `time` is empty.
     """
 
-    if not time:
+    if len(time) == 0:
         return -1, -1  # Handle empty list case
 
-    i1 = bisect.bisect_left(time, t1) - 1
-    i2 = bisect.bisect_right(time, t2)
+    start, stop = TimeIndex(time).windows(t1, t2)
 
-    i1 = max(-1, i1)  # Ensure i1 is not negative if t1 is before the start
-    i2 = min(len(time), i2)  # Ensure i2 is not beyond the end
+    i1 = max(-1, int(start) - 1)  # Ensure i1 is not negative if t1 is before the start
+    i2 = min(len(time), int(stop))  # Ensure i2 is not beyond the end
 
     return i1, i2
 
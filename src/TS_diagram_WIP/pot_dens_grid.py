@@ -1,13 +1,19 @@
+from functools import lru_cache
+
 import gsw
 import numpy as np
 
 
-def generate_potential_density_grid(abs_sal, cons_temp):
+def generate_potential_density_grid(abs_sal, cons_temp, s_res=0.1, t_res=1.0, decimals=2):
 	"""
 	Generates a potential density grid from abs_sal and potential temperature data.
 
 	:param abs_sal: Array of absolute abs_sal values.
 	:param cons_temp: Array of conservative temperature (= TEOS-10 while EOS-80 recommended potential temperature)
+	:param s_res: abs_sal resolution of the grid (g/kg)
+	:param t_res: temperature resolution of the grid (°C)
+	:param decimals: the grid extents are rounded to this number of decimals, so that figures built from the same data
+	(e.g., TS_depth and ts_backscatter) share the cached grid
 	:return: si (abs_sal array for contours), thetai (conservative temperature array for contours),dens (potential
 	density array).
 	"""
@@ -18,17 +24,27 @@ def generate_potential_density_grid(abs_sal, cons_temp):
 	# temperature range to compute potential density
 	thetamin = np.nanmin(cons_temp) - 0.1 * np.nanmax(cons_temp)
 	thetamax = np.nanmax(cons_temp) + 0.1 * np.nanmax(cons_temp)
+
+	si, thetai, pdens = _potential_density_grid(round(float(smin), decimals), round(float(smax), decimals),
+	                                            round(float(thetamin), decimals), round(float(thetamax), decimals),
+	                                            float(s_res), float(t_res))
+	# Copies so that callers can't alter the cached grid
+	return si.copy(), thetai.copy(), pdens.copy()
+
+
+@lru_cache(maxsize = 32)
+def _potential_density_grid(smin, smax, thetamin, thetamax, s_res, t_res):
+	"""
+	Computes the potential density (sigma-0) grid over [smin, smax] x [thetamin, thetamax] in one broadcast gsw call.
+	"""
 	# pot. density matrix resolution
-	xdim = int(np.round((smax - smin) / 0.1 + 1))
-	ydim = int(np.round((thetamax - thetamin) + 1))
-	# init. potential density matrix
-	pdens = np.zeros((ydim, xdim))
+	xdim = int(np.round((smax - smin) / s_res + 1))
+	ydim = int(np.round((thetamax - thetamin) / t_res + 1))
 	# temperature & abs_sal matrix for pot. density computing
-	thetai = np.arange(ydim) * 1 + thetamin
-	si = np.arange(xdim) * 0.1 + smin
-	# computing pot. density
-	for j in range(ydim):
-		for i in range(xdim):
-			pdens[j,i] = gsw.rho(si[i], gsw.CT_from_pt(si[i], thetai[j]), 0) - 1000
+	thetai = np.arange(ydim) * t_res + thetamin
+	si = np.arange(xdim) * s_res + smin
+	# computing pot. density over the (ydim, xdim) grid
+	s_grid, theta_grid = np.meshgrid(si, thetai)
+	pdens = gsw.rho(s_grid, gsw.CT_from_pt(s_grid, theta_grid), 0) - 1000
 
 	return si, thetai, pdens
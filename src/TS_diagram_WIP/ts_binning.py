@@ -0,0 +1,97 @@
+import numpy as np
+
+"""
+2D binned statistics on the salinity-temperature (S-T) plane, drawn as a single image so that the rendering time of
+TS diagrams does not depend on the number of CTD samples (see TS_depth and ts_backscatter with render = 'binned').
+"""
+
+TS_STATISTICS = ['count', 'mean', 'median', 'linear_mean']
+
+
+def ts_bin_edges(abs_sal, cons_temp, s_res=0.01, t_res=0.05):
+	"""
+	:param abs_sal: absolute salinity samples
+	:param cons_temp: conservative temperature samples
+	:param s_res: width of the salinity bins (g/kg)
+	:param t_res: width of the temperature bins (°C)
+	:return: s_edges, t_edges bin edges covering the samples
+	"""
+	s_min, s_max = np.floor(np.nanmin(abs_sal) / s_res) * s_res, np.nanmax(abs_sal)
+	t_min, t_max = np.floor(np.nanmin(cons_temp) / t_res) * t_res, np.nanmax(cons_temp)
+	s_edges = s_min + s_res * np.arange(int(np.floor((s_max - s_min) / s_res)) + 2)
+	t_edges = t_min + t_res * np.arange(int(np.floor((t_max - t_min) / t_res)) + 2)
+	return s_edges, t_edges
+
+
+def binned_ts_statistic(abs_sal, cons_temp, values=None, statistic='count', s_edges=None, t_edges=None):
+	"""
+	Computes a statistic of values in each (salinity, temperature) bin.
+
+	:param abs_sal: absolute salinity samples (any shape, flattened)
+	:param cons_temp: conservative temperature samples, same shape as abs_sal
+	:param values: values to aggregate, same shape as abs_sal (ignored for 'count')
+	:param statistic: 'count', 'mean', 'median' or 'linear_mean' (mean of dB values computed in the linear domain,
+	e.g. for Sv)
+	:param s_edges: salinity bin edges (default: ts_bin_edges)
+	:param t_edges: temperature bin edges (default: ts_bin_edges)
+	:return: grid (len(t_edges) - 1, len(s_edges) - 1) of the statistic (NaN for bins without samples, except for
+	'count'), s_edges, t_edges
+	"""
+	if statistic not in TS_STATISTICS:
+		raise ValueError(f"Invalid statistic: '{statistic}'. Supported statistics are {TS_STATISTICS}.")
+	s = np.asarray(abs_sal, dtype = float).ravel()
+	theta = np.asarray(cons_temp, dtype = float).ravel()
+	valid = np.isfinite(s) & np.isfinite(theta)
+	if statistic != 'count':
+		if values is None:
+			raise ValueError(f"values are required for the '{statistic}' statistic.")
+		values = np.asarray(values, dtype = float).ravel()
+		valid &= np.isfinite(values)
+		values = values[valid]
+	s, theta = s[valid], theta[valid]
+	if s_edges is None or t_edges is None:
+		default_s_edges, default_t_edges = ts_bin_edges(s, theta)
+		s_edges = default_s_edges if s_edges is None else s_edges
+		t_edges = default_t_edges if t_edges is None else t_edges
+
+	# Flat bin index of each sample, samples outside the edges are dropped
+	n_s, n_t = len(s_edges) - 1, len(t_edges) - 1
+	i_s = np.searchsorted(s_edges, s, side = 'right') - 1
+	i_t = np.searchsorted(t_edges, theta, side = 'right') - 1
+	inside = (i_s >= 0) & (i_s < n_s) & (i_t >= 0) & (i_t < n_t)
+	bins = i_t[inside] * n_s + i_s[inside]
+
+	counts = np.bincount(bins, minlength = n_s * n_t)
+	if statistic == 'count':
+		return counts.reshape(n_t, n_s), s_edges, t_edges
+
+	values = values[inside]
+	grid = np.full(n_s * n_t, np.nan)
+	filled = counts > 0
+	if statistic == 'mean':
+		grid[filled] = np.bincount(bins, weights = values, minlength = n_s * n_t)[filled] / counts[filled]
+	elif statistic == 'linear_mean':
+		linear = np.bincount(bins, weights = 10 ** (values / 10), minlength = n_s * n_t)[filled] / counts[filled]
+		grid[filled] = 10 * np.log10(linear)
+	else:
+		# Sort by bin then value: the median of each bin is read from the middle of its run
+		sorted_values = values[np.lexsort((values, bins))]
+		starts = np.cumsum(counts) - counts
+		lower = sorted_values[starts[filled] + (counts[filled] - 1) // 2]
+		upper = sorted_values[starts[filled] + counts[filled] // 2]
+		grid[filled] = (lower + upper) / 2
+
+	return grid.reshape(n_t, n_s), s_edges, t_edges
+
+
+def draw_ts_grid(ax, grid, s_edges, t_edges, **kwargs):
+	"""
+	Draws a binned S-T grid as one image.
+
+	:param ax: Set of axes to draw on
+	:param grid: grid returned by binned_ts_statistic
+	:param kwargs: passed to ax.imshow (cmap, vmin, vmax, zorder...)
+	:return: AxesImage
+	"""
+	return ax.imshow(np.ma.masked_invalid(grid), origin = 'lower', aspect = 'auto', interpolation = 'nearest',
+	                 extent = (s_edges[0], s_edges[-1], t_edges[0], t_edges[-1]), **kwargs)
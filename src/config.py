@@ -47,13 +47,20 @@ RAW_CTD = os.path.join(RAW_GLIDER_DIR, 'CTD', 'PROCESSED_data_POS_CORRECTED_abov
 RAW_GPS = os.path.join(RAW_GLIDER_DIR, 'glider.gps.csv')
 # RAW PATH BATHY
 RAW_GLIDER_BATHY=os.path.join(RAW_GLIDER_DIR, 'floor_depth_profile_2309_0610.mat')
+# CTD PROFILES (gridded profiles with TEOS-10 variables) AND THEIR MIXED LAYER DEPTH
+RAW_CTD_PROFILES = os.path.join(RAW_GLIDER_DIR, 'CTD', 'data_profiles.mat')
+RAW_MLD = os.path.join(RAW_GLIDER_DIR, 'CTD', 'MLD.mat')
 
 # --- Output File Names (for processed data, visualization-ready) ---
 # SURFACE CURRENTS
-# Filtered currents
-FILT_SURFACE_CURRENTS = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'IBI_data_filt', '.pkl')
+# Filtered currents (chunked HDF5 store, see oceanic_currents_winds/currents_store.py)
+FILT_SURFACE_CURRENTS = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'IBI_data_filt.h5')
 # Filtered and daily averaged currents
-AVG_FILT_SURFACE_CURRENTS = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'IBI_data_filt_avg', '.pkl')
+AVG_FILT_SURFACE_CURRENTS = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'IBI_data_filt_avg.h5')
+# Hashes of the last run of each stage of the currents workflow (see oceanic_currents_winds/currents_pipeline.py)
+CURRENTS_PIPELINE_STATE = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'currents_pipeline_state.json')
+# Cleaned buoy data (Parquet cache, see oceanic_currents_winds/wind_currents_quiver.py)
+BUOY_DATA_CACHE = os.path.join(PROCESSED_DATA_DIR, 'surface_currents', 'bilbao_buoy.parquet')
 # VESSEL ACOUSTIC
 VESSEL_ECHO = os.path.join(PROCESSED_DATA_DIR, 'vessel_echo')
 # VESSEL FISHING
@@ -68,6 +75,13 @@ PROCESSED_GLIDER_DIR = os.path.join(PROCESSED_DATA_DIR, 'glider')
 DAILY_GLIDER_GPS = os.path.join(PROCESSED_GLIDER_DIR, 'Daily_GPS', 'Glider_*.gps.csv')
 # ALL ANCHOVY DATA GLIDER ECHO
 PROCESSED_GLIDER_ANCHO = os.path.join(PROCESSED_GLIDER_DIR, 'echosounder', 'Juvenile_Anchovy_datasets_Sv_lin.csv')
+# Same, typed and sorted by time (Parquet, see glider_processing/anchovy_store.py)
+PROCESSED_GLIDER_ANCHO_PARQUET = os.path.join(PROCESSED_GLIDER_DIR, 'echosounder',
+                                              'Juvenile_Anchovy_datasets_Sv_lin.parquet')
+# STATE OF THE INCREMENTAL BV COMPUTATION (see BV_ferq/bv_online.py)
+BV_ONLINE_STATE = os.path.join(PROCESSED_GLIDER_DIR, 'CTD', 'bv_online_state.npz')
+# PARSED INPUT DATASETS (see core/data_catalog.py)
+CATALOG_CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, 'catalog_cache')
 
 # --- Plot File Names (.png) ---
 # SURFACE OCEANIC CURRENTS MAPS
@@ -76,6 +90,8 @@ SAMPLING_EFFORTS = os.path.join(PLOTS_DIR, 'map_sampling_effort.png')
 JUVENA2022_OVERVIEW=os.path.join(PLOTS_DIR, 'map_JUVENA2022_overview.png')
 SURVEY_PROFILE=os.path.join(PLOTS_DIR, 'survey_profile.png')
 BUOY_QUIVER=os.path.join(PLOTS_DIR, 'wind_current_quiver.png')
+# CTD SECTIONS (see CTD_WIP/CTD_profile.py)
+CTD_SECTIONS = os.path.join(PLOTS_DIR, 'ctd_sections')
 # --- Geographic and Temporal Bounds ---
 # Define the regions of interest for the Southeast Bay of Biscay
 BAY_OF_BISCAY={
@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.core.datetime_formating import combine_date_time, combine_date_time_array, matlab2datetime64, matlab2python
+
+"""
+Benchmarks the per-element date conversions (matlab2python, combine_date_time) against their vectorized versions
+(matlab2datetime64, combine_date_time_array) on synthetic time stamps.
+"""
+
+
+def synthetic_datenums(n, seed=0):
+	"""
+	Creates n sorted MATLAB datenums spread over the JUVENA 2022 survey (September-October 2022).
+	"""
+	rng = np.random.default_rng(seed)
+	return np.sort(738765 + 60 * rng.random(n))
+
+
+def synthetic_date_time_strings(n, seed=0):
+	"""
+	Creates n date ('%Y%m%d' integers) and time (' %H:%M:%S.%f' strings) columns like in the vessel echo exports.
+	"""
+	dates = matlab2datetime64(synthetic_datenums(n, seed)).astype('datetime64[us]')
+	ldates = np.char.replace(np.datetime_as_string(dates, unit = 'D'), '-', '').astype(int)
+	ltimes = np.char.add(' ', np.char.partition(np.datetime_as_string(dates, unit = 'us'), 'T')[:, 2])
+	return ldates, ltimes
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = "Benchmark MATLAB datenum and date/time string conversions")
+	parser.add_argument("--n", type = int, default = 1_000_000, help = "Number of time stamps")
+	args = parser.parse_args()
+
+	datenums = synthetic_datenums(args.n)
+
+	t0 = time.perf_counter()
+	ref = [matlab2python(d) for d in datenums]
+	t_loop = time.perf_counter() - t0
+	print(f"matlab2python (loop): {t_loop:.2f} s")
+
+	t0 = time.perf_counter()
+	dates = matlab2datetime64(datenums)
+	t_vec = time.perf_counter() - t0
+	print(f"matlab2datetime64: {t_vec:.3f} s (x{t_loop / t_vec:.0f})")
+	max_diff = np.abs(dates - np.array(ref, dtype = 'datetime64[ns]')).max()
+	print(f"Max difference: {max_diff}")
+
+	ldates, ltimes = synthetic_date_time_strings(args.n)
+
+	t0 = time.perf_counter()
+	ref = combine_date_time(ldates.tolist(), ltimes.tolist())
+	t_loop = time.perf_counter() - t0
+	print(f"combine_date_time (loop): {t_loop:.2f} s")
+
+	t0 = time.perf_counter()
+	dates = combine_date_time_array(ldates, ltimes)
+	t_vec = time.perf_counter() - t0
+	print(f"combine_date_time_array: {t_vec:.3f} s (x{t_loop / t_vec:.0f})")
+	print(f"Same output: {np.array_equal(dates, np.array(ref, dtype = 'datetime64[ns]'))}")
@@ -0,0 +1,204 @@
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.core.pipeline import code_files
+
+"""
+Lazy catalog of the glider input datasets (CTD, MLD, bathymetry, anchovy detections).
+A dataset is loaded on first access only. It is then kept in memory (least recently used datasets are dropped beyond
+a memory budget) and pickled on disk once parsed, so that several figure scripts, run in one session or one after
+the other, read and parse each raw file once. Both caches are invalidated when a source file changes (size or mtime)
+or when the code of the loader changes (its module and the src/ modules it imports).
+Cached datasets are shared between callers: copy them before modifying them.
+
+	from src.core.data_catalog import catalog
+	date, cond, depth, lon, lat, pressure, salinity, temp = catalog['ctd']
+"""
+
+
+class DataCatalog:
+	def __init__(self, cache_dir=config.CATALOG_CACHE_DIR, memory_budget_mb=1024, disk_cache=True):
+		"""
+		:param cache_dir: directory of the parsed (pickled) datasets
+		:param memory_budget_mb: memory (MB) the datasets kept in memory may use
+		:param disk_cache: use the on-disk cache of parsed datasets
+		"""
+		self.cache_dir = cache_dir
+		self.memory_budget = memory_budget_mb * 1024 ** 2
+		self.disk_cache = disk_cache
+		self._loaders = {}  # name: (loader, source paths, use the disk cache)
+		self._memory = OrderedDict()  # name: (source key, dataset, size in bytes), least recently used first
+
+	def register(self, name, loader, *paths, disk_cache=True):
+		"""
+		:param name: name of the dataset
+		:param loader: function loading the dataset from paths (called as loader(*paths))
+		:param paths: source files of the dataset, their changes invalidate the cached dataset
+		:param disk_cache: pickle the dataset on disk (False for datasets the loader already reads from a parsed cache)
+		"""
+		self._loaders[name] = (loader, paths, disk_cache)
+		self._memory.pop(name, None)
+
+	def __contains__(self, name):
+		return name in self._loaders
+
+	def __getitem__(self, name):
+		return self.get(name)
+
+	def names(self):
+		return list(self._loaders)
+
+	def get(self, name):
+		"""
+		:param name: name of a registered dataset
+		:return: the dataset, from memory, from the disk cache or loaded from its sources (in this order)
+		"""
+		if name not in self._loaders:
+			raise KeyError(f"Unknown dataset '{name}', registered datasets are {self.names()}")
+		loader, paths, disk_cache = self._loaders[name]
+		key = _source_key(name, paths, loader)
+
+		if name in self._memory and self._memory[name][0] == key:
+			self._memory.move_to_end(name)
+			return self._memory[name][1]
+
+		dataset = self._read_disk_cache(name, key) if disk_cache else None
+		if dataset is None:
+			dataset = loader(*paths)
+			if disk_cache:
+				self._write_disk_cache(name, key, dataset)
+		self._keep_in_memory(name, key, dataset)
+		return dataset
+
+	def invalidate(self, name=None):
+		"""
+		Drops the cached dataset name (all of them if None) from memory and disk.
+		"""
+		for n in ([name] if name else self.names()):
+			self._memory.pop(n, None)
+			for path in glob.glob(os.path.join(self.cache_dir, f'{n}-*.pkl')):
+				os.remove(path)
+
+	def memory_usage(self):
+		"""
+		:return: size (bytes) of the datasets kept in memory
+		"""
+		return sum(size for _, _, size in self._memory.values())
+
+	def _keep_in_memory(self, name, key, dataset):
+		self._memory[name] = (key, dataset, _nbytes(dataset))
+		self._memory.move_to_end(name)
+		# Drop the least recently used datasets (never the one just loaded) to fit the budget
+		while self.memory_usage() > self.memory_budget and len(self._memory) > 1:
+			self._memory.popitem(last = False)
+
+	def _cache_path(self, name, key):
+		return os.path.join(self.cache_dir, f'{name}-{key}.pkl')
+
+	def _read_disk_cache(self, name, key):
+		if not self.disk_cache or not os.path.exists(self._cache_path(name, key)):
+			return None
+		try:
+			with open(self._cache_path(name, key), 'rb') as f:
+				return pickle.load(f)
+		except (OSError, pickle.UnpicklingError, EOFError):  # Unreadable cache, parse the sources again
+			return None
+
+	def _write_disk_cache(self, name, key, dataset):
+		if not self.disk_cache:
+			return
+		os.makedirs(self.cache_dir, exist_ok = True)
+		# Remove the caches of previous versions of the sources
+		for path in glob.glob(os.path.join(self.cache_dir, f'{name}-*.pkl')):
+			os.remove(path)
+		tmp_path = self._cache_path(name, key) + '.tmp'
+		with open(tmp_path, 'wb') as f:
+			# noinspection PyTypeChecker
+			pickle.dump(dataset, f, protocol = pickle.HIGHEST_PROTOCOL)
+		os.replace(tmp_path, self._cache_path(name, key))
+
+
+def _source_key(name, paths, loader):
+	"""
+	:return: hash of the dataset name, of the code of its loader and of the path, size and mtime of its sources
+	"""
+	h = hashlib.sha1(name.encode())
+	h.update(_code_hash(loader).encode())
+	for path in paths:
+		stat = os.stat(path)
+		h.update(f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+	return h.hexdigest()[:16]
+
+
+@lru_cache(maxsize = None)
+def _code_hash(loader):
+	"""
+	:return: hash of the source of the loader's module and of the src/ modules it imports (computed once per session)
+	"""
+	h = hashlib.sha1()
+	for path in code_files(loader):
+		with open(path, 'rb') as f:
+			h.update(f.read())
+	return h.hexdigest()
+
+
+def _nbytes(obj):
+	"""
+	:return: approximate memory size (bytes) of a dataset (arrays, DataFrames and containers of them)
+	"""
+	if isinstance(obj, np.ndarray):
+		return obj.nbytes if obj.dtype != object else obj.nbytes + sum(sys.getsizeof(e) for e in obj.flat)
+	if isinstance(obj, (pd.DataFrame, pd.Series)):
+		return int(np.sum(obj.memory_usage(deep = True)))
+	if isinstance(obj, dict):
+		return sum(_nbytes(v) for v in obj.values())
+	if isinstance(obj, (list, tuple)):
+		return sys.getsizeof(obj) + sum(_nbytes(e) for e in obj)
+	return sys.getsizeof(obj)
+
+
+def _load_ctd(path):
+	from src.BV_ferq.bv_frequencies import load_dot_mat_CTD
+	return load_dot_mat_CTD(path)
+
+
+def _load_mld(path):
+	from src.core.glider_survey_profile import load_dot_mat_mld
+	return load_dot_mat_mld(path)
+
+
+def _load_bathy(path):
+	from src.core.glider_survey_profile import load_dot_mat_bathy
+	return load_dot_mat_bathy(path)
+
+
+def _load_ancho(path):
+	from src.core.glider_survey_profile import load_dot_mat_ancho
+	return load_dot_mat_ancho(path)
+
+
+def default_catalog(**kwargs):
+	"""
+	:param kwargs: see DataCatalog
+	:return: DataCatalog of the glider inputs of config: 'ctd', 'mld', 'bathy' and 'ancho'
+	"""
+	data_catalog = DataCatalog(**kwargs)
+	data_catalog.register('ctd', _load_ctd, config.RAW_CTD)
+	data_catalog.register('mld', _load_mld, config.RAW_MLD_FILTERED)
+	data_catalog.register('bathy', _load_bathy, config.RAW_GLIDER_BATHY)
+	# The anchovy detections are read from their Parquet copy (see anchovy_store.py), not pickled again
+	data_catalog.register('ancho', _load_ancho, config.PROCESSED_GLIDER_ANCHO, disk_cache = False)
+	return data_catalog
+
+
+# Catalog shared by the scripts of the session
+catalog = default_catalog()
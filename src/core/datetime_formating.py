@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 import numpy as np
+import pandas as pd
 
 
 def combine_date_time(ldates: list, ltimes: list):
@@ -51,6 +52,68 @@ def matlab2python(matlab_datenum: float) -> datetime:
     return datetime.fromordinal(int(days)) + timedelta(days=days % 1)
 
 
+# MATLAB datenum of 1970-01-01 (numpy's datetime64 epoch)
+MATLAB_UNIX_EPOCH = 719529
+
+# Formats tried (in order) by combine_date_time_array
+DATE_FORMATS = ['%Y%m%d', '%d-%b-%Y']
+TIME_FORMATS = ['%H:%M:%S.%f', '%I:%M %p']
+
+
+def matlab2datetime64(matlab_datenums) -> np.ndarray:
+	"""
+	Converts an array of MATLAB datenums to a numpy datetime64[ns] array (vectorized matlab2python, rounded to the
+	microsecond, i.e. within 1 µs of matlab2python). NaNs are converted to NaT.
+	"""
+	days = np.asarray(matlab_datenums, dtype = float)
+	microseconds = np.round((days - MATLAB_UNIX_EPOCH) * 86400e6)
+	nat = np.isnan(microseconds)
+	dates = np.where(nat, 0, microseconds).astype(np.int64).astype('datetime64[us]').astype('datetime64[ns]')
+	dates[nat] = np.datetime64('NaT')
+	return dates
+
+
+def combine_date_time_array(ldates, ltimes) -> np.ndarray:
+	"""
+	Same as combine_date_time but returns a numpy datetime64[ns] array. The date and time formats (see DATE_FORMATS and
+	TIME_FORMATS) are detected once per column, from its first value, and the whole column is parsed at once.
+
+	Args:
+	  ldates: A list (or array, Series) of integers or strings representing dates.
+	  ltimes: A list (or array, Series) of strings representing times.
+
+	Returns:
+	  A numpy datetime64[ns] array.
+	"""
+	if len(ldates) != len(ltimes):
+		raise ValueError("ldates and ltimes must have the same length")
+	if len(ldates) == 0:
+		return np.array([], dtype = 'datetime64[ns]')
+
+	# Convert to str and get rid of useless spaces before and after
+	ldates = pd.Series(ldates).astype(str).str.strip().to_numpy()
+	ltimes = pd.Series(ltimes).astype(str).str.strip().to_numpy()
+
+	date_format = _detect_format(ldates[0], DATE_FORMATS)
+	time_format = _detect_format(ltimes[0], TIME_FORMATS)
+
+	combined = pd.to_datetime(pd.Series(ldates) + ' ' + pd.Series(ltimes), format = f'{date_format} {time_format}')
+	return combined.to_numpy(dtype = 'datetime64[ns]')
+
+
+def _detect_format(value: str, formats: list) -> str:
+	"""
+	Returns the first format of formats able to parse value.
+	"""
+	for fmt in formats:
+		try:
+			datetime.strptime(value, fmt)
+			return fmt
+		except ValueError:
+			pass
+	raise ValueError(f"'{value}' does not match any of the formats {formats}")
+
+
 
 if __name__ == "__main__":
 	# # Example usage
@@ -5,12 +5,14 @@ import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 from scipy.interpolate import interp1d
-from scipy.io import loadmat
 
 from src import config
-from src.BV_ferq.bv_frequencies import load_dot_mat_CTD, compute_bv_freq, bv_freq_avg_every_k_meters
-from src.BV_ferq.filter_lp import get_sampling_freq_total_time, get_cutoff_freq_norm, get_lp_butter_lp_filter_param, \
-	lp_filter
+from src.BV_ferq.bv_frequencies import load_bv_freq, bv_freq_avg_every_k_meters
+from src.BV_ferq.filter_lp import get_sampling_freq_total_time
+from src.core.data_catalog import catalog
+from src.core.lowpass import lowpass
+from src.core.mat_io import load_mat
+from src.glider_processing.anchovy_store import convert_ancho_csv, is_up_to_date, read_ancho
 
 
 # TC_path = r"C:\Users\G to the A\Desktop\MT\Programming\Accoustic\Thermocline_data"
@@ -23,24 +25,30 @@ from src.BV_ferq.filter_lp import get_sampling_freq_total_time, get_cutoff_freq_
 def load_dot_mat_mld(MLD_path=config.RAW_MLD_FILTERED, MLD_file_name="MLD_filtered.mat"):
 	# Load data
 	# data_mld_filtered = loadmat(f"{MLD_path}\\{MLD_file_name}", squeeze_me = True)
-	data_mld_filtered = loadmat(MLD_path, squeeze_me = True)
-	mld = data_mld_filtered['MLD_7h_LP'][0:915].reshape(-1, 1).flatten()
+	data_mld_filtered = load_mat(MLD_path, 'MLD_7h_LP', rows = slice(0, 915))
+	mld = data_mld_filtered['MLD_7h_LP'].reshape(-1, 1).flatten()
 
 	return mld
 
 
 def load_dot_mat_bathy(bathy_path=config.RAW_GLIDER_BATHY, bathy_file_name="floor_depth_profile_2309_0610.mat"):
 	# data_bathy = loadmat(f"{bathy_path}\\{bathy_file_name}")
-	data_bathy = loadmat(bathy_path)
+	data_bathy = load_mat(bathy_path, 'bathy_profile', squeeze_me = False)
 	bathy = data_bathy['bathy_profile'].reshape(-1, 1).flatten()
 
 	return bathy
 
 
-def load_dot_mat_ancho(ancho_path=config.PROCESSED_GLIDER_ANCHO):
-	acoustic_df = pd.read_csv(ancho_path)
-	acoustic_df = acoustic_df[acoustic_df['Sv_lin'] != 0]  # Filter out null values
-	acoustic_df['Time_avg_UTC'] = pd.to_datetime(acoustic_df['Time_avg_UTC'], format = '%d-%b-%Y %H:%M:%S')
+def load_dot_mat_ancho(ancho_path=config.PROCESSED_GLIDER_ANCHO, time_window=None, depth_range=None,
+                       parquet_path=config.PROCESSED_GLIDER_ANCHO_PARQUET):
+	"""
+	Null detections are filtered out and Time_avg_UTC parsed once, when the CSV is converted to Parquet (see
+	anchovy_store.py), then only the detections within time_window and depth_range are read. Unlike the CSV rows, the
+	detections are sorted by time (with a new 0..n-1 index) and the Depth and Sv columns are float32.
+	"""
+	if not is_up_to_date(ancho_path, parquet_path):
+		convert_ancho_csv(ancho_path, parquet_path)
+	acoustic_df = read_ancho(parquet_path, time_window, depth_range)
 
 	return acoustic_df
 
@@ -60,32 +68,64 @@ def extract_curves(bv_matrix, threshold=0.024):
 			   Returns None if no values exceed the threshold.
 	"""
 
-	depths, times = bv_matrix.shape
+	upper_boundary, lower_boundary = extract_curves_sweep(bv_matrix, [threshold])
+	# Make sure it's a list of integers
+	upper_boundary = [round(e) for e in upper_boundary[0]]
+	lower_boundary = [round(e) for e in lower_boundary[0]]
 
-	upper_boundary = np.full(times, np.nan, dtype = float)  # Initialize with NaN
-	lower_boundary = np.full(times, np.nan, dtype = float)  # Initialize with NaN
+	return upper_boundary, lower_boundary, threshold
 
-	for t in range(times):
-		exceed_indices = [i for i, e in enumerate(bv_matrix[:, t]) if e > threshold]
 
-		if len(exceed_indices) > 0:
-			upper_boundary[t] = exceed_indices[0]  # First index above threshold
-			lower_boundary[t] = exceed_indices[-1]  # Last index above threshold
+def extract_curves_sweep(bv_matrix, thresholds):
+	"""
+	Same as extract_curves for a whole vector of thresholds at once (e.g. to check the sensitivity of the
+	boundaries to the threshold).
 
-	valid_times = ~np.isnan(upper_boundary)
-	if np.any(valid_times):  # Check if any valid times exist
-		f_upper = interp1d(np.where(valid_times)[0], upper_boundary[valid_times], kind = 'linear',
-		                   fill_value = "extrapolate")
-		upper_boundary = f_upper(np.arange(times))
+	Args:
+		bv_matrix (numpy.ndarray): 2D array of BV frequency values (depth x time).
+		thresholds (array-like): 1D array of threshold values.
 
-		f_lower = interp1d(np.where(valid_times)[0], lower_boundary[valid_times], kind = 'linear',
-		                   fill_value = "extrapolate")
-		lower_boundary = f_lower(np.arange(times))
-	# Make sure it's a list of integers
-	upper_boundary = [round(e) for e in upper_boundary]
-	lower_boundary = [round(e) for e in lower_boundary]
+	Returns:
+		tuple: A tuple containing two numpy arrays (threshold x time):
+			   - upper_boundary: Depth indices (rounded) for the upper boundaries.
+			   - lower_boundary: Depth indices (rounded) for the lower boundaries.
+			   Times without any value above a threshold are linearly interpolated (or extrapolated) from the others,
+			   rows stay NaN if no value exceeds the threshold at all.
+	"""
+	upper_boundary, lower_boundary = boundary_indices(bv_matrix, thresholds)
+	times = np.arange(bv_matrix.shape[1])
+	for boundary in [upper_boundary, lower_boundary]:
+		for row in boundary:
+			valid_times = ~np.isnan(row)
+			if np.any(valid_times):  # Check if any valid times exist
+				f = interp1d(times[valid_times], row[valid_times], kind = 'linear', fill_value = "extrapolate")
+				row[:] = f(times)
 
-	return upper_boundary, lower_boundary, threshold
+	return np.round(upper_boundary), np.round(lower_boundary)
+
+
+def boundary_indices(bv_matrix, thresholds):
+	"""
+	Finds, for every threshold and time, the first and last depth indices where BV values exceed the threshold.
+
+	Args:
+		bv_matrix (numpy.ndarray): 2D array of BV frequency values (depth x time).
+		thresholds (array-like): 1D array of threshold values.
+
+	Returns:
+		tuple: upper_boundary and lower_boundary (threshold x time), NaN where no value exceeds the threshold.
+	"""
+	thresholds = np.atleast_1d(np.asarray(thresholds, dtype = float))
+	depths = bv_matrix.shape[0]
+	exceed = bv_matrix[None, :, :] > thresholds[:, None, None]  # (threshold x depth x time), NaNs never exceed
+	any_exceed = exceed.any(axis = 1)
+
+	upper_boundary = np.argmax(exceed, axis = 1).astype(float)  # First index above threshold
+	lower_boundary = depths - 1 - np.argmax(exceed[:, ::-1, :], axis = 1).astype(float)  # Last index above threshold
+	upper_boundary[~any_exceed] = np.nan
+	lower_boundary[~any_exceed] = np.nan
+
+	return upper_boundary, lower_boundary
 
 
 def plot_acoustic_profile(date, mld, bathy, acoustic_df, upper_boundary, lower_boundary, threshold, depth_avg, cf_h):
@@ -103,11 +143,8 @@ def plot_acoustic_profile(date, mld, bathy, acoustic_df, upper_boundary, lower_b
 	s1 = [depth_avg[e] for e in upper_boundary]
 	s2 = [depth_avg[e] for e in lower_boundary]
 	# Low pass signals
-	sf, length_sec = get_sampling_freq_total_time(s1, 14)
-	fc = get_cutoff_freq_norm(cf_h, length_sec)
-	a, b = get_lp_butter_lp_filter_param(4, fc)
-	s1 = lp_filter(a, b, s1)
-	s2 = lp_filter(a, b, s2)
+	sf, length_sec = get_sampling_freq_total_time(s1, date)
+	s1, s2 = lowpass([s1, s2], 1 / (cf_h * 3600), sf, order = 4)  # Cutoff in Hz
 	# Plot ribbon
 	ax1.fill_between(date, s1, s2, fc = 'red', alpha = 0.2,
 	                 label = f"Depth averaged BV freq. > {threshold:.1E} Hz, LP {cf_h}h")
@@ -153,11 +190,12 @@ def fine_tune_acoustic_profile(ax, cbar, date):
 
 
 if __name__ == "__main__":
-	date, cond, depth, lon, lat, pressure, salinity, temp = load_dot_mat_CTD()
-	mld = load_dot_mat_mld()
-	bathy = load_dot_mat_bathy()
-	acoustic_df = load_dot_mat_ancho()
-	X1, Y1, n = compute_bv_freq(salinity, temp, pressure, lat, date, depth, )
+	# Each input is read and parsed once (see data_catalog.py)
+	date, depth, n = load_bv_freq()  # TEOS-10 N2, as the other BV figures
+	mld = catalog['mld']
+	bathy = catalog['bathy']
+	# Only the detections of the plotted period are read from the Parquet copy of the anchovy dataset
+	acoustic_df = load_dot_mat_ancho(time_window = (date[0], date[-1]))
 	X2, Y2, bv_mean, depth_avg = bv_freq_avg_every_k_meters(n, depth, date)
 	upper_boundary, lower_boundary, threshold = extract_curves(bv_mean, 2.7 * 10 ** (-2))
 	fig, ax, cbar = plot_acoustic_profile(date, mld, bathy, acoustic_df, upper_boundary, lower_boundary, threshold,
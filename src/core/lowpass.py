@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfiltfilt
+
+"""
+Butterworth filter engine shared by all low-pass paths (surface currents, BV boundaries...).
+Filters are designed in second-order sections (SOS), numerically robust even at high orders and low cutoffs, and each
+design is cached so that it is computed once per (order, cutoff, fs, type).
+"""
+
+
+@lru_cache(maxsize = 128)
+def design_filter(order, cutoff, fs=2.0, btype='low'):
+	"""
+	:param order: order of the Butterworth filter
+	:param cutoff: cutoff frequency, in the same unit as fs (with fs = 2, normalized so that Nyquist = 1)
+	:param fs: sampling frequency
+	:param btype: 'low', 'high', 'bandpass' or 'bandstop'
+	:return: SOS array of the filter (shared between calls, do not modify it)
+	"""
+	return butter(order, cutoff, btype = btype, fs = fs, output = 'sos')
+
+
+def lowpass(x, cutoff, fs=2.0, order=4, axis=-1):
+	"""
+	Zero-phase low-pass filtering (sosfiltfilt) of N-D arrays along any axis.
+
+	:param x: array to filter, every series along axis is filtered in one call
+	:param cutoff: cutoff frequency, in the same unit as fs (with fs = 2, normalized so that Nyquist = 1)
+	:param fs: sampling frequency
+	:param order: order of the Butterworth filter
+	:param axis: axis along which to filter (time axis)
+	:return: filtered array, same shape as x. NaNs propagate to the whole series, fill them beforehand.
+	"""
+	return sosfiltfilt(design_filter(order, float(cutoff), float(fs), 'low'), np.asarray(x, dtype = float),
+	                   axis = axis)
+
+
+def lowpass_hours(x, cutoff_h, sampling_period_s, order=4, axis=-1):
+	"""
+	Same as lowpass for a cutoff period in hours and a sampling period in seconds.
+
+	:param x: array to filter
+	:param cutoff_h: periods shorter than cutoff_h hours are filtered out
+	:param sampling_period_s: time between two samples (seconds)
+	:param order: order of the Butterworth filter
+	:param axis: axis along which to filter (time axis)
+	:return: filtered array, same shape as x
+	"""
+	return lowpass(x, 1 / (cutoff_h * 3600), 1 / sampling_period_s, order, axis)
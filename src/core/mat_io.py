@@ -0,0 +1,108 @@
+import h5py
+import numpy as np
+import scipy.io as sio
+
+"""
+Access layer for MATLAB .mat files reading only the requested variables, and only the requested rows of them.
+	- v4 to v7 files: scipy.io.loadmat restricted to the requested variables (rows are selected after reading).
+	- v7.3 files (HDF5): variables are read with h5py straight from the requested rows (hyperslab of the chunked
+	  datasets), so the whole variable is never loaded. HDF5 stores MATLAB arrays transposed, they are transposed back.
+Both return the same arrays as scipy.io.loadmat (with squeeze_me).
+"""
+
+
+def is_mat_v73(path):
+	"""
+	:return: True if path is a MATLAB v7.3 (HDF5) .mat file
+	"""
+	return h5py.is_hdf5(path)
+
+
+def mat_variables(path):
+	"""
+	:return: names of the variables of a .mat file (without reading them)
+	"""
+	if is_mat_v73(path):
+		with h5py.File(path, 'r') as f:
+			return [name for name in f.keys() if not name.startswith('#')]
+	return [name for name, _, _ in sio.whosmat(path)]
+
+
+def load_mat(path, variable_names=None, rows=None, squeeze_me=True):
+	"""
+	Loads some variables of a .mat file.
+
+	:param path: path of the .mat file
+	:param variable_names: names of the variables to load (all of them if None)
+	:param rows: index (slice, int or sorted int array) along the first axis of the variables (first non-singleton
+	axis with squeeze_me), either one index for every variable or a dict {variable name: index}, variables missing from
+	the dict being fully read
+	:param squeeze_me: squeeze singleton dimensions (as scipy.io.loadmat)
+	:return: dict {variable name: numpy array}
+	"""
+	if variable_names is not None:
+		variable_names = [variable_names] if isinstance(variable_names, str) else list(variable_names)
+	if not isinstance(rows, dict):
+		rows = {name: rows for name in (variable_names or mat_variables(path))} if rows is not None else {}
+
+	if is_mat_v73(path):
+		return _load_mat_v73(path, variable_names, rows, squeeze_me)
+
+	data = sio.loadmat(path, variable_names = variable_names, squeeze_me = squeeze_me)
+	missing = set(variable_names or []) - set(data)
+	if missing:
+		raise KeyError(f"Variables {sorted(missing)} not found in '{path}'")
+	data = {name: value for name, value in data.items() if not name.startswith('__')}
+	for name, index in rows.items():
+		# Scalars and strings have no rows
+		if index is not None and name in data and np.ndim(data[name]) and np.asarray(data[name]).dtype.kind not in 'US':
+			data[name] = np.asarray(data[name])[index]
+	return data
+
+
+def _load_mat_v73(path, variable_names, rows, squeeze_me):
+	"""
+	Reads the variables of a v7.3 .mat file, only the requested rows being read from disk.
+	"""
+	data = {}
+	with h5py.File(path, 'r') as f:
+		for name in variable_names or [name for name in f.keys() if not name.startswith('#')]:
+			if name not in f:
+				raise KeyError(f"Variable '{name}' not found in '{path}'")
+			data[name] = _read_v73_variable(f[name], rows.get(name), squeeze_me)
+	return data
+
+
+def _read_v73_variable(dataset, index, squeeze_me):
+	"""
+	Reads (the rows index of) a numeric or char HDF5 dataset and returns it with its MATLAB orientation.
+	"""
+	if not isinstance(dataset, h5py.Dataset):
+		raise TypeError(f"'{dataset.name}' is a {type(dataset).__name__}, only numeric and char arrays are supported")
+	is_char = dataset.attrs.get('MATLAB_class', b'') in (b'char', 'char')
+	matlab_shape = dataset.shape[::-1]
+	selection = [slice(None)] * len(matlab_shape)
+	# MATLAB axes of the values read (an int index drops its axis)
+	kept_axes = list(range(len(matlab_shape)))
+	if index is not None and not is_char and matlab_shape:
+		# The rows are along the first (non-singleton with squeeze_me) MATLAB axis, i.e. the last HDF5 axes
+		axes = [i for i, n in enumerate(matlab_shape) if n != 1 or not squeeze_me]
+		if axes:  # Squeezed scalars have no rows
+			selection[len(matlab_shape) - 1 - axes[0]] = index
+			if isinstance(index, (int, np.integer)):
+				kept_axes.remove(axes[0])
+	values = dataset[tuple(selection)] if dataset.shape else dataset[()]
+	values = np.asarray(values).T
+
+	if is_char:
+		# Char arrays are stored as uint16 codes, one string per row
+		values = np.atleast_2d(values)
+		strings = np.array([''.join(map(chr, row)) for row in values])
+		return str(strings[0]) if squeeze_me and len(strings) == 1 else strings
+	if squeeze_me:
+		# Only the axes singleton in the whole variable are squeezed (as loadmat, which squeezes before the rows are
+		# selected): a selection of one row keeps its axis
+		singleton = tuple(i for i, axis in enumerate(kept_axes) if matlab_shape[axis] == 1)
+		values = np.squeeze(values, axis = singleton)
+		return values[()] if values.ndim == 0 else values
+	return values
@@ -0,0 +1,221 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+
+"""
+Small incremental pipeline runner. Each stage declares its input files, its parameters and its output files. A stage
+is skipped when the content of its inputs, its parameters and its code did not change since its last successful run
+(and its outputs still exist). The code of a stage is the module of its function and every module of src/ this module
+imports, directly or not, plus the files the stage declares.
+"""
+
+
+class Stage:
+	def __init__(self, name, func, inputs=None, outputs=None, params=None, options=None, code=None):
+		"""
+		:param name: name of the stage (unique within a pipeline)
+		:param func: function running the stage, called as func(**inputs, **outputs, **params, **options)
+		:param inputs: dict {argument name: path} of the files (or directories) read by the stage
+		:param outputs: dict {argument name: path} of the files (or directories) written by the stage
+		:param params: dict of parameters changing the outputs of the stage (hashed)
+		:param options: dict of parameters not changing the outputs, e.g. number of workers (not hashed)
+		:param code: list of the modules or files the stage depends on but does not import (e.g. scripts it runs), in
+		addition to the src/ modules imported by the module of func
+		"""
+		self.name = name
+		self.func = func
+		self.inputs = inputs or {}
+		self.outputs = outputs or {}
+		self.params = params or {}
+		self.options = options or {}
+		self.code = code or []
+
+	def run(self):
+		self.func(**self.inputs, **self.outputs, **self.params, **self.options)
+
+
+class Pipeline:
+	def __init__(self, stages, state_path):
+		"""
+		:param stages: list of Stage. They are run in dependency order (a stage reading the output of another one runs
+		after it)
+		:param state_path: JSON file where the hashes of the last successful runs are kept
+		"""
+		self.stages = _sort_stages(stages)
+		self.state_path = state_path
+
+	def run(self, force=False):
+		"""
+		Runs the stages whose inputs, parameters or code changed.
+
+		:param force: run every stage regardless of the hashes
+		:return: list of the names of the stages that were run
+		"""
+		state = self._load_state()
+		file_hashes = state.setdefault('files', {})
+		ran = []
+		for stage in self.stages:
+			key = _stage_key(stage, file_hashes)
+			outputs_exist = all(os.path.exists(path) for path in stage.outputs.values())
+			if not force and outputs_exist and state['stages'].get(stage.name) == key:
+				print(f"Stage '{stage.name}' is up to date, skipped.")
+				continue
+			print(f"Running stage '{stage.name}'...")
+			stage.run()
+			ran.append(stage.name)
+			state['stages'][stage.name] = key
+			self._save_state(state)  # Save after each stage so a failure does not invalidate the previous ones
+		return ran
+
+	def _load_state(self):
+		if os.path.exists(self.state_path):
+			with open(self.state_path) as f:
+				return json.load(f)
+		return {'stages': {}, 'files': {}}
+
+	def _save_state(self, state):
+		os.makedirs(os.path.dirname(self.state_path), exist_ok = True)
+		with open(self.state_path, 'w') as f:
+			json.dump(state, f, indent = 1)
+
+
+def _sort_stages(stages):
+	"""
+	:return: stages sorted so that each stage comes after the stages producing its inputs
+	"""
+	producers = {os.path.abspath(path): stage for stage in stages for path in stage.outputs.values()}
+	ordered, visiting = [], set()
+
+	def visit(stage):
+		if stage in ordered:
+			return
+		if stage in visiting:
+			raise ValueError(f"Cyclic dependency involving stage '{stage.name}'")
+		visiting.add(stage)
+		for path in stage.inputs.values():
+			producer = producers.get(os.path.abspath(path))
+			if producer is not None:
+				visit(producer)
+		visiting.discard(stage)
+		ordered.append(stage)
+
+	for stage in stages:
+		visit(stage)
+	return ordered
+
+
+def _stage_key(stage, file_hashes):
+	"""
+	:return: hash of the stage's code, parameters and input contents
+	"""
+	h = hashlib.sha256()
+	h.update(stage.name.encode())
+	for path in code_files(stage.func, stage.code):
+		h.update(os.path.relpath(path, _SRC_ROOT).encode())
+		h.update(_file_hash(path, file_hashes).encode())
+	h.update(json.dumps(stage.params, sort_keys = True, default = str).encode())
+	for name, path in sorted(stage.inputs.items()):
+		h.update(name.encode())
+		h.update(_path_hash(path, file_hashes).encode())
+	return h.hexdigest()
+
+
+# Directory containing the src package
+_SRC_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def code_files(func, dependencies=()):
+	"""
+	:param func: function (e.g. of a stage)
+	:param dependencies: modules or paths of additional code dependencies
+	:return: sorted paths of the module of func, of the src/ modules it imports transitively (imports within functions
+	included) and of the dependencies
+	"""
+	files = set()
+	pending = [_source_file(func)]
+	for dependency in dependencies:
+		pending.append(_source_file(dependency) if inspect.ismodule(dependency) else dependency)
+	while pending:
+		path = pending.pop()
+		# Code without source file (built-in, defined interactively) is not tracked
+		if path is None or not os.path.isfile(path) or os.path.abspath(path) in files:
+			continue
+		path = os.path.abspath(path)
+		files.add(path)
+		if path.endswith('.py'):
+			pending.extend(_imported_src_files(path))
+	return sorted(files)
+
+
+def _source_file(obj):
+	"""
+	:return: path of the source file of a function or module, None if it has none
+	"""
+	try:
+		return inspect.getsourcefile(obj)
+	except TypeError:
+		return None
+
+
+def _imported_src_files(path):
+	"""
+	:return: paths of the modules of src/ imported by a Python file (absolute 'src.' imports and imports of modules of
+	the same directory)
+	"""
+	with open(path, 'rb') as f:
+		tree = ast.parse(f.read(), filename = path)
+	names = []
+	for node in ast.walk(tree):
+		if isinstance(node, ast.Import):
+			names += [alias.name for alias in node.names]
+		elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+			# The imported names may be submodules (from src.core import lowpass)
+			names += [node.module] + [f'{node.module}.{alias.name}' for alias in node.names]
+
+	files = []
+	src_dir = os.path.join(_SRC_ROOT, 'src')
+	for name in names:
+		relative = os.path.join(*name.split('.'))
+		for base in (_SRC_ROOT, os.path.dirname(path)):
+			for candidate in (relative + '.py', os.path.join(relative, '__init__.py')):
+				candidate = os.path.join(base, candidate)
+				if candidate.startswith(src_dir + os.sep) and os.path.isfile(candidate):
+					files.append(candidate)
+	return files
+
+
+def _path_hash(path, file_hashes):
+	"""
+	:return: content hash of a file or of all the files of a directory, '' if path does not exist
+	"""
+	if os.path.isdir(path):
+		h = hashlib.sha256()
+		for root, dirs, files in sorted(os.walk(path)):
+			for file in sorted(files):
+				file_path = os.path.join(root, file)
+				h.update(os.path.relpath(file_path, path).encode())
+				h.update(_file_hash(file_path, file_hashes).encode())
+		return h.hexdigest()
+	if os.path.exists(path):
+		return _file_hash(path, file_hashes)
+	return ''
+
+
+def _file_hash(path, file_hashes, block_size=2 ** 20):
+	"""
+	SHA-256 of the content of a file. Hashes are memoized in file_hashes with the size and modification time of the
+	file, so unchanged (large) inputs are not read again on each run.
+	"""
+	stat = os.stat(path)
+	path = os.path.abspath(path)
+	signature = [stat.st_size, stat.st_mtime_ns]
+	if path in file_hashes and file_hashes[path][0] == signature:
+		return file_hashes[path][1]
+	h = hashlib.sha256()
+	with open(path, 'rb') as f:
+		for block in iter(lambda: f.read(block_size), b''):
+			h.update(block)
+	file_hashes[path] = [signature, h.hexdigest()]
+	return h.hexdigest()
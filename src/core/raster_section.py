@@ -0,0 +1,74 @@
+import matplotlib.dates as mdates
+import numpy as np
+
+"""
+Raster (pcolormesh) rendering of long gridded sections, e.g. time-depth CTD or BV sections. Kept apart from
+plot_utils.py (maps, rasterio and cartopy) so that the section scripts don't depend on the GIS libraries.
+"""
+
+
+def plot_raster_section(ax, x, y, z, cmap='jet', max_pixels=None, contour_levels=None, **kwargs):
+	"""
+	Draws a gridded (e.g., time-depth) section with pcolormesh instead of a many-level contourf. The grid is first
+	block-averaged (NaN-aware) down to the pixel resolution of ax, so the rendering time does not grow with the
+	length of the section.
+
+	Args:
+		ax (matplotlib.axes.Axes): The axis on which to draw the section.
+		x (array-like): Coordinates of the columns of z (numbers, datetime or datetime64), 1D or 2D meshgrid.
+		y (array-like): Coordinates of the rows of z, 1D or 2D meshgrid.
+		z (numpy.ndarray): 2D array (len(y), len(x)) to draw.
+		cmap (str or Colormap, optional): Colormap. Defaults to 'jet'.
+		max_pixels (tuple of int, optional): (width, height) resolution to decimate to. Defaults to the size of ax
+											 in pixels.
+		contour_levels (array-like of float, optional): Levels of dashed black contours computed on the decimated
+		                                                grid.
+		**kwargs: Passed to ax.pcolormesh (vmin, vmax, norm...).
+
+	Returns:
+		matplotlib.collections.QuadMesh: The drawn mesh (e.g., for a colorbar).
+	"""
+	x, y, z = np.asarray(x), np.asarray(y), np.asarray(z, dtype = float)
+	# 1D coordinates from meshgrids
+	x = x[0, :] if x.ndim == 2 else x
+	y = y[:, 0] if y.ndim == 2 else y
+	if z.shape != (len(y), len(x)):
+		raise ValueError(f"z must be (len(y), len(x)) = {(len(y), len(x))}, got {z.shape}")
+
+	# Dates are decimated as matplotlib date numbers
+	is_date = x.dtype == object or np.issubdtype(x.dtype, np.datetime64)
+	x = mdates.date2num(x) if is_date else x.astype(float)
+
+	if max_pixels is None:
+		bbox = ax.get_window_extent()
+		max_pixels = (bbox.width, bbox.height)
+	x_factor = max(int(np.ceil(len(x) / max(max_pixels[0], 1))), 1)
+	y_factor = max(int(np.ceil(len(y) / max(max_pixels[1], 1))), 1)
+	x, y = _block_mean(x, x_factor, 0), _block_mean(y.astype(float), y_factor, 0)
+	z = _block_mean(_block_mean(z, y_factor, 0), x_factor, 1)
+
+	mesh = ax.pcolormesh(x, y, np.ma.masked_invalid(z), cmap = cmap, shading = 'nearest', rasterized = True, **kwargs)
+	if contour_levels is not None and len(contour_levels):
+		ax.contour(x, y, z, levels = contour_levels, colors = 'k', linestyles = '--')
+	if is_date:
+		ax.xaxis_date()
+
+	return mesh
+
+
+def _block_mean(a, factor, axis):
+	"""
+	NaN-aware mean over consecutive blocks of factor elements along axis (the last block may be shorter).
+	"""
+	if factor <= 1:
+		return a
+	a = np.moveaxis(a, axis, 0)
+	pad = (-a.shape[0]) % factor
+	if pad:
+		a = np.concatenate([a, np.full((pad,) + a.shape[1:], np.nan)])
+	a = a.reshape((-1, factor) + a.shape[1:])
+	finite = np.isfinite(a)
+	sums = np.where(finite, a, 0).sum(axis = 1)
+	counts = finite.sum(axis = 1)
+	means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+	return np.moveaxis(means, 0, axis)
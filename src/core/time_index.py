@@ -0,0 +1,91 @@
+import numpy as np
+
+from src.core.datetime_formating import matlab2datetime64
+
+"""
+Time index on a sorted datetime64 array: time windows and nearest-time lookups are answered with np.searchsorted, for
+one query or many queries at once.
+"""
+
+
+class TimeIndex:
+	def __init__(self, times):
+		"""
+		:param times: time stamps (datetime objects, datetime64 or strings understood by numpy), sorted or not. They are
+		sorted (stable) once, see self.order.
+		"""
+		times = np.atleast_1d(np.asarray(times, dtype = 'datetime64[ns]'))
+		if times.ndim != 1:
+			raise ValueError("times must be a 1D array.")
+		if np.isnat(times).any():
+			raise ValueError("times can't contain NaT.")
+		if len(times) > 1 and (times[1:] < times[:-1]).any():
+			# Position in the given times of each sorted time
+			self.order = np.argsort(times, kind = 'stable')
+			self.times = times[self.order]
+		else:
+			self.order = None
+			self.times = times
+
+	@classmethod
+	def from_matlab(cls, datenums):
+		"""
+		:param datenums: MATLAB datenums
+		:return: TimeIndex of the datenums
+		"""
+		return cls(matlab2datetime64(np.ravel(datenums)))
+
+	def __len__(self):
+		return len(self.times)
+
+	def windows(self, t1, t2):
+		"""
+		Bounds of the time windows [t1, t2] (both included) in the sorted times.
+
+		:param t1: start time(s) of the windows
+		:param t2: end time(s) of the windows, same shape as t1
+		:return: starts, stops such that self.times[starts[i]:stops[i]] are the times within [t1[i], t2[i]] (scalars
+		if t1 and t2 are scalars). Empty windows have starts >= stops.
+		"""
+		starts = np.searchsorted(self.times, np.asarray(t1, dtype = 'datetime64[ns]'), side = 'left')
+		stops = np.searchsorted(self.times, np.asarray(t2, dtype = 'datetime64[ns]'), side = 'right')
+		return starts, stops
+
+	def window(self, t1, t2):
+		"""
+		:return: slice of the sorted times within [t1, t2]
+		"""
+		start, stop = self.windows(t1, t2)
+		return slice(int(start), int(stop))
+
+	def nearest(self, t):
+		"""
+		Position, in the given times, of the time nearest to each query time (the earliest one on ties).
+
+		:param t: query time(s)
+		:return: int or array of int, same shape as t
+		"""
+		if not len(self.times):
+			raise ValueError("Can't look up the nearest time in an empty TimeIndex.")
+		t = np.asarray(t, dtype = 'datetime64[ns]')
+		right = np.clip(np.searchsorted(self.times, t, side = 'left'), 1, max(len(self.times) - 1, 1))
+		left = right - 1
+		if len(self.times) == 1:
+			nearest = np.zeros_like(right)
+		else:
+			# Distances as int64 nanoseconds (no overflow within the survey time spans)
+			before = np.abs((t - self.times[left]).astype(np.int64))
+			after = np.abs((self.times[right] - t).astype(np.int64))
+			nearest = np.where(after < before, right, left)
+		if self.order is not None:
+			nearest = self.order[nearest]
+		return nearest if nearest.ndim else int(nearest)
+
+	def indices(self, window):
+		"""
+		:param window: slice of the sorted times (e.g. returned by window)
+		:return: positions, in the given times, of the times of window
+		"""
+		if self.order is None:
+			return np.arange(len(self.times))[window]
+		return self.order[window]
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import config
+
+"""
+Columnar (Parquet) copy of the juvenile anchovy detections of the glider echosounder.
+The CSV is parsed once: null detections (Sv_lin = 0) are dropped, Time_avg_UTC is stored as datetime64, depths and Sv
+as float32, and rows are sorted by time and written in row groups. Row-group statistics then let read_ancho skip
+everything outside the requested time window and depth range (e.g. a plot of one day only reads that day).
+The Parquet file records the size and mtime of the CSV and is rebuilt when they change.
+"""
+
+TIME_COLUMN = 'Time_avg_UTC'
+TIME_FORMAT = '%d-%b-%Y %H:%M:%S'
+DEPTH_COLUMN = 'Depth_start'
+
+
+def convert_ancho_csv(csv_path=config.PROCESSED_GLIDER_ANCHO, parquet_path=config.PROCESSED_GLIDER_ANCHO_PARQUET,
+                      row_group_size=50_000):
+	"""
+	Converts the anchovy detections CSV to Parquet.
+
+	:param csv_path: path of the CSV export
+	:param parquet_path: path of the Parquet file to write
+	:param row_group_size: number of rows per row group (granularity of the time/depth filtering)
+	:return: parquet_path
+	"""
+	stat = os.stat(csv_path)
+	df = pd.read_csv(csv_path)
+	df = df[df['Sv_lin'] != 0]  # Filter out null values
+	df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN], format = TIME_FORMAT)
+	# Depths and Sv in single precision
+	for column in df.columns:
+		if column.startswith(('Depth', 'Sv')) and pd.api.types.is_float_dtype(df[column]):
+			df[column] = df[column].astype(np.float32)
+	df = df.sort_values(TIME_COLUMN, kind = 'stable').reset_index(drop = True)
+
+	table = pa.Table.from_pandas(df, preserve_index = False)
+	table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+	                                       b'source_size': str(stat.st_size).encode(),
+	                                       b'source_mtime_ns': str(stat.st_mtime_ns).encode()})
+	os.makedirs(os.path.dirname(parquet_path), exist_ok = True)
+	tmp_path = parquet_path + '.tmp'
+	pq.write_table(table, tmp_path, row_group_size = row_group_size, compression = 'zstd')
+	os.replace(tmp_path, parquet_path)
+
+	return parquet_path
+
+
+def is_up_to_date(csv_path=config.PROCESSED_GLIDER_ANCHO, parquet_path=config.PROCESSED_GLIDER_ANCHO_PARQUET):
+	"""
+	:return: True if the Parquet file exists and was converted from the current version of the CSV
+	"""
+	if not os.path.exists(parquet_path):
+		return False
+	stat = os.stat(csv_path)
+	metadata = pq.read_schema(parquet_path).metadata or {}
+	return (metadata.get(b'source_size') == str(stat.st_size).encode() and
+	        metadata.get(b'source_mtime_ns') == str(stat.st_mtime_ns).encode())
+
+
+def read_ancho(parquet_path=config.PROCESSED_GLIDER_ANCHO_PARQUET, time_window=None, depth_range=None, columns=None):
+	"""
+	Reads the anchovy detections, only the row groups overlapping the time window and depth range being read.
+
+	:param parquet_path: path of the Parquet file (see convert_ancho_csv)
+	:param time_window: (start, end) times (datetime, datetime64 or Timestamp), both included
+	:param depth_range: (shallowest, deepest) Depth_start, both included
+	:param columns: columns to read (all by default)
+	:return: DataFrame of the detections, sorted by time
+	"""
+	filters = []
+	if time_window is not None:
+		start, end = (pd.Timestamp(t).to_datetime64().astype('datetime64[ns]') for t in time_window)
+		filters += [(TIME_COLUMN, '>=', start), (TIME_COLUMN, '<=', end)]
+	if depth_range is not None:
+		filters += [(DEPTH_COLUMN, '>=', np.float32(depth_range[0])), (DEPTH_COLUMN, '<=', np.float32(depth_range[1]))]
+	return pq.read_table(parquet_path, columns = columns, filters = filters or None).to_pandas()
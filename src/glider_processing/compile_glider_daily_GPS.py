@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from src.core.datetime_formating import combine_date_time
+from src.core.datetime_formating import combine_date_time_array
 
 """
 Compiles daily glider GPS .csv files and format the date and time.
@@ -17,10 +17,8 @@ for file in csv_files:
 
 combined_df = pd.concat(dfs, ignore_index = True)
 
-# Combine dates and times into datetime object (result is a list)
-new_datetimes = combine_date_time(combined_df['GPS_date'].tolist(), combined_df['GPS_time'].tolist())
-# Insert it as a pandas.Series object in combined_df
-combined_df['GPS_date']=pd.Series(new_datetimes)
+# Combine dates and times into datetime64 (result is an array)
+combined_df['GPS_date'] = combine_date_time_array(combined_df['GPS_date'], combined_df['GPS_time'])
 # Delete GPS_time series in combined_df
 del combined_df['GPS_time']
 # Sort the combined DataFrame by the 'GPS_date' column
@@ -0,0 +1,157 @@
+import os
+
+import gsw
+import h5py
+import numpy as np
+
+from src import config
+from src.core.datetime_formating import matlab2datetime64
+from src.core.mat_io import load_mat
+
+"""
+TEOS-10 derived variables of the glider CTD, computed once per CTD file and stored next to it in a chunked and
+compressed HDF5 file. The file records the size and modification time of the source .mat and is rebuilt when they
+change. Variables are (profiles x levels) matrices read lazily, profile range by profile range.
+
+	SA: absolute salinity (g/kg)
+	CT: conservative temperature (°C)
+	rho: in-situ density (kg/m^3)
+	sigma0: potential density anomaly referenced to 0 dbar (kg/m^3)
+	N2: squared Brunt-Väisälä frequency (1/s^2), (profiles x levels - 1) at pressures p_mid
+"""
+
+# Raw CTD variables copied to the derived file
+RAW_VARIABLES = ['conductivity', 'pressure', 'salinity', 'temperature']
+DERIVED_VARIABLES = ['SA', 'CT', 'rho', 'sigma0', 'N2', 'p_mid']
+# Bump to rebuild the files written by a previous version of build_ctd_derived
+DERIVED_VERSION = 1
+
+
+def derived_ctd_path(path2ctd=config.RAW_CTD):
+	"""
+	:param path2ctd: path of the CTD .mat file
+	:return: path of its derived-variable file (next to it)
+	"""
+	return os.path.splitext(path2ctd)[0] + '_derived.h5'
+
+
+def is_up_to_date(path2ctd=config.RAW_CTD, path2derived=None):
+	"""
+	:return: True if the derived file exists and was built from the current version of the CTD file
+	"""
+	path2derived = path2derived or derived_ctd_path(path2ctd)
+	if not os.path.exists(path2derived):
+		return False
+	stat = os.stat(path2ctd)
+	try:
+		with h5py.File(path2derived, 'r') as f:
+			return (f.attrs.get('version') == DERIVED_VERSION and f.attrs.get('source_size') == stat.st_size and
+			        f.attrs.get('source_mtime_ns') == stat.st_mtime_ns)
+	except OSError:  # Unreadable (e.g. interrupted write)
+		return False
+
+
+def compute_derived(salinity, temperature, pressure, lon, lat):
+	"""
+	Computes the TEOS-10 derived variables of CTD profiles (also used by the consumers receiving profiles that are not
+	in a CTD file yet, see BV_ferq/bv_online.py).
+
+	:param salinity, temperature, pressure: practical salinity, in-situ temperature and pressure (profiles x levels)
+	:param lon, lat: position of each profile
+	:return: dict of the DERIVED_VARIABLES
+	"""
+	# Position of each sample, without copying the profile positions along the levels
+	lon_grid = np.broadcast_to(np.asarray(lon, dtype = float)[:, np.newaxis], pressure.shape)
+	lat_grid = np.broadcast_to(np.asarray(lat, dtype = float)[:, np.newaxis], pressure.shape)
+	sa = gsw.SA_from_SP(salinity, pressure, lon_grid, lat_grid)
+	ct = gsw.CT_from_t(sa, temperature, pressure)
+	n2, p_mid = gsw.Nsquared(sa, ct, pressure, lat_grid, axis = 1)
+	return {'SA': sa, 'CT': ct, 'rho': gsw.rho(sa, ct, pressure), 'sigma0': gsw.sigma0(sa, ct), 'N2': n2,
+	        'p_mid': p_mid}
+
+
+def build_ctd_derived(path2ctd=config.RAW_CTD, path2derived=None, compression_level=4, chunk_profiles=64):
+	"""
+	Computes the TEOS-10 derived variables of a CTD file and writes them with the raw variables and axes.
+
+	:param path2ctd: path of the CTD .mat file
+	:param path2derived: path of the .h5 file to write (default: derived_ctd_path(path2ctd))
+	:param compression_level: gzip compression level (0-9)
+	:param chunk_profiles: number of profiles per chunk
+	:return: path of the derived file
+	"""
+	path2derived = path2derived or derived_ctd_path(path2ctd)
+	stat = os.stat(path2ctd)
+	data = load_mat(path2ctd, ['time', 'longitude', 'latitude', 'depth'] + RAW_VARIABLES)
+	time = np.atleast_1d(np.asarray(data['time'], dtype = float))
+	lon = np.atleast_1d(np.asarray(data['longitude'], dtype = float))
+	lat = np.atleast_1d(np.asarray(data['latitude'], dtype = float))
+	raw = {name: np.atleast_2d(np.asarray(data[name], dtype = float)) for name in RAW_VARIABLES}
+	derived = compute_derived(raw['salinity'], raw['temperature'], raw['pressure'], lon, lat)
+
+	# Write to a temporary file first so that an interrupted build never looks up to date
+	tmp_path = path2derived + '.tmp'
+	with h5py.File(tmp_path, 'w') as f:
+		f.attrs['version'] = DERIVED_VERSION
+		f.attrs['source'] = os.path.basename(path2ctd)
+		f.attrs['source_size'] = stat.st_size
+		f.attrs['source_mtime_ns'] = stat.st_mtime_ns
+		f.create_dataset('time', data = time)
+		f.create_dataset('longitude', data = lon)
+		f.create_dataset('latitude', data = lat)
+		f.create_dataset('depth', data = np.asarray(data['depth'], dtype = float))
+		for name, values in {**raw, **derived}.items():
+			f.create_dataset(name, data = values, chunks = (min(chunk_profiles, values.shape[0]), values.shape[1]),
+			                 compression = 'gzip', compression_opts = compression_level, shuffle = True)
+	os.replace(tmp_path, path2derived)
+
+	return path2derived
+
+
+class CTDDerived:
+	def __init__(self, path2ctd=config.RAW_CTD, path2derived=None, rebuild=False):
+		"""
+		Lazy reader of the derived variables of a CTD file, (re)built first if missing or outdated. Only the axes
+		(time, longitude, latitude, depth) are read when opening, variables are read on demand.
+
+		:param path2ctd: path of the CTD .mat file
+		:param path2derived: path of the derived .h5 file (default: derived_ctd_path(path2ctd))
+		:param rebuild: force the rebuild of the derived file
+		"""
+		self.path = path2derived or derived_ctd_path(path2ctd)
+		if rebuild or not is_up_to_date(path2ctd, self.path):
+			build_ctd_derived(path2ctd, self.path)
+		self.file = h5py.File(self.path, 'r')
+		self.time = self.file['time'][()]
+		self.longitude = self.file['longitude'][()]
+		self.latitude = self.file['latitude'][()]
+		self.depth = self.file['depth'][()]
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __len__(self):
+		return len(self.time)
+
+	def __getitem__(self, name):
+		return self.read(name)
+
+	def close(self):
+		self.file.close()
+
+	def dates(self):
+		"""
+		:return: datetime64[ns] array matching self.time
+		"""
+		return matlab2datetime64(self.time)
+
+	def read(self, name, profiles=slice(None)):
+		"""
+		:param name: variable to read (see RAW_VARIABLES and DERIVED_VARIABLES)
+		:param profiles: int, slice or sorted indices of the profiles to read
+		:return: array (levels,) or (profiles, levels)
+		"""
+		return self.file[name][profiles]
@@ -1,37 +1,26 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import butter, filtfilt
 
+from src.core.lowpass import lowpass_hours
 
-def butfilt(ff_filt, signal, sr):
+
+def butfilt(ff_filt, signal, sr, axis=-1):
 	"""
-	This is a lowpass digital filter.
+	This is a lowpass digital filter (10th order Butterworth, zero-phase).
+	The filter design is cached and applied in second-order sections, see src/core/lowpass.py.
 
 	Args:
 		ff_filt: Frequencies to filter > ff_filt (in hours).
 				 For example, if you want to filter everything with a frequency higher than 20 hours, ff_filt = 20.
-		signal: Time series to be filtered.
+		signal: Time series to be filtered. N-D arrays are filtered along axis in one call.
 		sr: Sampling rate (samples per second).
+		axis: Time axis of signal (default = -1).
 
 	Returns:
 		Xfilt: Filtered time series.
 	"""
 
-	fs = 1 / sr  # Sampling frequency of our signal (Hz)
-	nf = 0.5 * fs  # Nyquist frequency
-
-	x = signal  # Signal [cite: 3]
-
-	filtf = 1 / (ff_filt * 60 * 60)  # Upper limit of frequencies to be passed in Hertz
-
-	# Normalize the filtering frequencies with the Nyquist frequency to
-	# obtain the coefficients for the Butterworth filter
-	filtc = filtf / nf
-
-	b, a = butter(10, filtc, btype = 'low')
-
-	# Filtering
-	Xfilt = filtfilt(b, a, x)
+	Xfilt = lowpass_hours(signal, ff_filt, sr, order = 10, axis = axis)
 
 	return Xfilt
 
@@ -0,0 +1,53 @@
+import argparse
+import os
+
+from src import config
+from src.core.pipeline import Pipeline, Stage
+from src.oceanic_currents_winds.daily_averaging import run_daily_averaging
+from src.oceanic_currents_winds.filtering import run_filtering
+from src.oceanic_currents_winds.plot_surface_currents import render_daily_maps
+
+"""
+Runs the surface currents workflow (filtering.py -> daily_averaging.py -> plot_surface_currents.py), skipping the
+stages whose inputs, parameters and code did not change since their last run.
+"""
+
+
+def build_currents_pipeline(cutoff_h=72, start_index=73, n_workers=None):
+	"""
+	Args:
+		cutoff_h (float): Cutoff of the low-pass filter (in hours).
+		start_index (int): Index of the first hourly time step averaged (73 -> 23/09/2022).
+		n_workers (int): Number of processes used to filter and plot (does not change the outputs).
+
+	Returns:
+		Pipeline: The surface currents pipeline.
+	"""
+	stages = [
+		Stage('filtering', run_filtering,
+		      inputs = {'path2file': config.RAW_SURFACE_CURRENT},
+		      outputs = {'path2store': config.FILT_SURFACE_CURRENTS},
+		      params = {'filtering_freq': cutoff_h},
+		      options = {'n_workers': n_workers}),
+		Stage('daily_averaging', run_daily_averaging,
+		      inputs = {'path2store': config.FILT_SURFACE_CURRENTS},
+		      outputs = {'path2avg': config.AVG_FILT_SURFACE_CURRENTS},
+		      params = {'start_index': start_index}),
+		Stage('plotting', render_daily_maps,
+		      inputs = {'path2avg': config.AVG_FILT_SURFACE_CURRENTS},
+		      outputs = {'save_dir': config.SURFACE_OCEANIC_CURRENTS_MAPS},
+		      options = {'n_workers': n_workers}),
+	]
+	return Pipeline(stages, config.CURRENTS_PIPELINE_STATE)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = "Run the surface currents workflow")
+	parser.add_argument("--cutoff", type = float, default = 72, help = "Low-pass cutoff (hours)")
+	parser.add_argument("--start-index", type = int, default = 73, help = "First hourly time step to average")
+	parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "Number of processes")
+	parser.add_argument("--force", action = "store_true", help = "Run every stage")
+	args = parser.parse_args()
+
+	pipeline = build_currents_pipeline(args.cutoff, args.start_index, args.workers)
+	pipeline.run(force = args.force)
@@ -0,0 +1,96 @@
+import os
+
+import h5py
+import numpy as np
+
+from src.core.datetime_formating import matlab2datetime64
+from src.oceanic_currents_winds.ocean_cells import OceanCells
+
+"""
+Chunked and compressed HDF5 store for the filtered and averaged surface oceanic currents.
+Components are stored for ocean cells only (see ocean_cells.py) with one chunk per time step, so that a single time
+step (e.g. one day to plot) is read without loading the whole record.
+"""
+
+
+def write_currents_store(path, ocean_mask, lon, lat, time, compression_level=4, **components):
+	"""
+	Writes current components to an HDF5 store.
+
+	Args:
+		path (str): Path of the .h5 file to create (overwritten if it exists).
+		ocean_mask (numpy.ndarray): 2D boolean array (longitude, latitude), True for ocean cells.
+		lon (numpy.ndarray): Longitudes of the grid.
+		lat (numpy.ndarray): Latitudes of the grid.
+		time (numpy.ndarray): 1D array of MATLAB datenums matching the last axis of the components.
+		compression_level (int): gzip compression level (0-9).
+		**components (numpy.ndarray): 2D arrays (n_ocean_cells, time) to store, e.g. u_flt=..., v_flt=...
+	"""
+	time = np.atleast_1d(np.squeeze(np.asarray(time, dtype = float)))
+	os.makedirs(os.path.dirname(path), exist_ok = True)
+	with h5py.File(path, 'w') as f:
+		f.create_dataset('ocean_mask', data = ocean_mask)
+		f.create_dataset('lon', data = lon)
+		f.create_dataset('lat', data = lat)
+		f.create_dataset('time', data = time)
+		for name, data in components.items():
+			if data.shape != (np.count_nonzero(ocean_mask), len(time)):
+				raise ValueError(f"{name} must be (n_ocean_cells, time), got {data.shape}")
+			f.create_dataset(name, data = data, chunks = (max(data.shape[0], 1), 1), compression = 'gzip',
+			                 compression_opts = compression_level, shuffle = True)
+
+
+class CurrentsStore:
+	def __init__(self, path):
+		"""
+		Lazy reader of a store written by write_currents_store. Only the grid and time axis are read when opening,
+		components are read on demand.
+
+		:param path: path of the .h5 file
+		"""
+		self.path = path
+		self.file = h5py.File(path, 'r')
+		self.ocean_mask = self.file['ocean_mask'][()]
+		self.lon = self.file['lon'][()]
+		self.lat = self.file['lat'][()]
+		self.time = self.file['time'][()]
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __len__(self):
+		return len(self.time)
+
+	def close(self):
+		self.file.close()
+
+	def dates(self):
+		"""
+		:return: list of datetime objects matching self.time
+		"""
+		return matlab2datetime64(self.time).astype('datetime64[us]').tolist()
+
+	def read(self, name, time_index=slice(None)):
+		"""
+		:param name: component to read (e.g. 'u_flt')
+		:param time_index: int or slice of time steps to read
+		:return: array (n_ocean_cells,) or (n_ocean_cells, time)
+		"""
+		return self.file[name][:, time_index]
+
+	def cells(self, name, time_index=slice(None)):
+		"""
+		:return: OceanCells holding the component over the requested time steps
+		"""
+		return OceanCells(self.ocean_mask, self.read(name, time_index))
+
+	def grid(self, name, i):
+		"""
+		:param name: component to read
+		:param i: time step
+		:return: 2D array (longitude, latitude) of the component at time step i, land cells being NaN
+		"""
+		return OceanCells(self.ocean_mask, self.read(name, slice(i, i + 1))).to_grid()[:, :, 0]
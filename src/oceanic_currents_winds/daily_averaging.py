@@ -1,7 +1,7 @@
-import datetime
-import pickle
-import numpy as np
-from src.core.datetime_formating import matlab2python
+from src import config
+from src.core.datetime_formating import matlab2datetime64
+from src.oceanic_currents_winds.currents_store import CurrentsStore, write_currents_store
+from src.oceanic_currents_winds.resampling import resample_components, resample_current
 """
 Used to average surface oceanic current's velocity components for each calendar day after being low-passed.
 """
@@ -14,8 +14,9 @@ def calculate_daily_average_component(u, t):
 	Args:
 		u (numpy.ndarray): A 3D NumPy array representing the velocity of the
 			oceanic current along the u-component.
-			Dimensions: (longitude, latitude, time).
-		t (numpy.ndarray): A 1D NumPy array containing datetime objects
+			Dimensions: (longitude, latitude, time). The 2D data of OceanCells
+			(n_ocean_cells, time) is accepted as well.
+		t (numpy.ndarray): A 1D NumPy array containing MATLAB datenums
 			corresponding to the time dimension of the 'u' array.
 
 	Returns:
@@ -29,28 +30,8 @@ def calculate_daily_average_component(u, t):
 			If a day has no measurements, the corresponding slice in the
 			output array will contain NaNs.
 	"""
-	# 1. Get the unique days from the datetime array `t`.
-	t=np.squeeze(t) # Make sure its squeezed
-	t= [matlab2python(date) for date in t]
-	unique_days = np.unique([date.toordinal() for date in t])  # Use ordinal representation for efficient comparison
-	num_days = len(unique_days)
-
-	# 2. Create an empty array to store the daily averages.  Initialize with NaN.
-	u_daily_averaged = np.full((u.shape[0], u.shape[1], num_days), np.nan, dtype = u.dtype)
-
-	# 3. Iterate through each unique day.
-	t2 = []  # Initialize an empty list to store the unique days as datetime objects
-	for i, day_ordinal in enumerate(unique_days):
-		# Convert the ordinal back to a datetime object for comparison.
-		day_dt = datetime.datetime.fromordinal(day_ordinal)
-		t2.append(day_dt.date())  # Append the datetime object to the t2 list
-
-		# Create a boolean mask to find the time indices corresponding to the current day.
-		daily_mask = np.array([(date.toordinal() == day_ordinal) for date in t])
-
-		# 4. Calculate the daily average for each longitude and latitude.
-		if np.any(daily_mask):  # Check if there are any measurements for the current day.
-			u_daily_averaged[:, :, i] = np.nanmean(u[:, :, daily_mask], axis = 2)
+	(u_daily_averaged,), starts = resample_components(t, u, period = 'daily')
+	t2 = matlab2datetime64(starts).astype('datetime64[D]').tolist()
 
 	return u_daily_averaged, t2
 
@@ -58,41 +39,44 @@ def calculate_daily_average_component(u, t):
 def calculate_average_current(u, v, t):
 	"""
 	Calculates daily averages for both component of the oceanic current
-	Assuming there will be no days for which one component is known and the other is not.
+	Day labels are computed once and shared by both components (see resampling.py).
 	"""
-	u_daily_averaged, t2 = calculate_daily_average_component(u, t)
-	v_daily_averaged, t2 = calculate_daily_average_component(v, t)
-	return u_daily_averaged, v_daily_averaged, t2
+	return resample_current(u, v, t, period = 'daily')
 
 
-if __name__ == '__main__':
+def run_daily_averaging(path2store=config.FILT_SURFACE_CURRENTS, path2avg=config.AVG_FILT_SURFACE_CURRENTS,
+                        start_index=73):
+	"""
+	Reads the filtered currents store (see filtering.py), averages them for each calendar day and saves the result
+	in a new store (see currents_store.py).
 
-	path2file = r'../data/surface_currents/IBI_data_filt.pkl'
-	try:
-		with open(path2file, 'rb') as f:
-			data_flt = pickle.load(f)
-			print(f"The file '{path2file}' was imported successfully.")
-		u_flt, v_flt, t = data_flt['u_flt'], data_flt['v_flt'], data_flt['time_ibi']
-		# Data of interest (23/09/2022 and on) starts after
-		u_flt=u_flt[:,:,73:]
-		v_flt=v_flt[:,:,73:]
-		t=np.squeeze(t)
-		t=t[73:]
+	Args:
+		path2store (str): Path of the filtered currents .h5 store.
+		path2avg (str): Path of the daily averaged currents .h5 store to write.
+		start_index (int): Index of the first time step of interest (data of interest, 23/09/2022 and on, starts
+			after 73 hourly time steps).
+	"""
+	with CurrentsStore(path2store) as store:
+		print(f"The file '{path2store}' was opened successfully.")
+		# u_flt and v_flt hold ocean cells only (n_ocean_cells, time)
+		u_flt = store.read('u_flt', slice(start_index, None))
+		v_flt = store.read('v_flt', slice(start_index, None))
+		t = store.time[start_index:]
 
 		# Average signals for each calendar days
-		u_d_avg, v_d_avg, t2 = calculate_average_current(u_flt, v_flt, t)
+		(u_d_avg, v_d_avg), t2 = resample_components(t, u_flt, v_flt, period = 'daily')
+
+		# Save the averages with the grid of the filtered currents
+		write_currents_store(path2avg, store.ocean_mask, store.lon, store.lat, t2, u_d_avg = u_d_avg,
+		                     v_d_avg = v_d_avg)
+	print(f"The daily averaged currents were saved successfully in '{path2avg}'.")
 
-		# Create new file to save adding the newly created variables
-		IBI_data_filt_avg = data_flt.copy()
-		IBI_data_filt_avg['u_d_avg'] = u_d_avg
-		IBI_data_filt_avg['v_d_avg'] = v_d_avg
-		IBI_data_filt_avg['t2'] = t2
 
-		# Save the new data along the old one in a pickle file
-		with open(r'../../data/surface_currents/IBI_data_filt_avg.pkl', 'wb') as f:
-			pickle.dump(IBI_data_filt_avg, f)
-			print(f"The variable was saved successfully.")
+if __name__ == '__main__':
+
+	try:
+		run_daily_averaging()
 	except FileNotFoundError:
-		print(f"Error: The file '{path2file}' was not found.")
+		print(f"Error: The file '{config.FILT_SURFACE_CURRENTS}' was not found.")
 	except Exception as e:
 		print(f"An error occurred while importing the file: {e}")
@@ -1,15 +1,22 @@
-import pickle
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
-import scipy.io
 
-from butfilt import butfilt
+from src import config
+from src.core.mat_io import load_mat
+from src.oceanic_currents_winds.butfilt import butfilt
+from src.oceanic_currents_winds.currents_store import write_currents_store
+from src.oceanic_currents_winds.ocean_cells import OceanCells, ocean_mask
 
 """
 Uses butfilt.py to apply a low pass filter to surface oceanic current's velocity components.
 Next step is to average the returned data over a calendar day. See daily_averaging.py  
 """
 
+# Variables of the IBI .mat file used here
+IBI_VARIABLES = ['u_ibi', 'v_ibi', 'lon_ibi', 'lat_ibi', 'time_ibi']
+
+
 def filter_data(data_u: np.ndarray, data_v: np.ndarray, filtering_freq=72) -> tuple[np.ndarray, np.ndarray]:
 	"""
 	Filters the input data_u and data_v using a Butterworth filter.
@@ -54,19 +61,101 @@ def filter_data(data_u: np.ndarray, data_v: np.ndarray, filtering_freq=72) -> tu
 	return serie_u_filt, serie_v_filt
 
 
+def filter_data_batch(data_u: np.ndarray, data_v: np.ndarray, filtering_freq=72, n_workers=None,
+                      tile_size=16) -> tuple[np.ndarray, np.ndarray]:
+	"""
+	Same as filter_data but filters the whole cubes along the time axis at once. The Butterworth filter is designed
+	a single time (cached, see butfilt) and applied to every (longitude, latitude) cell in one vectorized call.
+
+	Args:
+		data_u (np.ndarray): 3D NumPy array containing u-component data (time series in the 3rd dimension).
+		data_v (np.ndarray): 3D NumPy array containing v-component data (time series in the 3rd dimension).
+		filtering_freq (float):  The cutoff frequency for the filter (in hours).
+		n_workers (int): If given, the cubes are split in spatial tiles filtered by a pool of n_workers processes.
+						 Use it for cubes too large to be filtered in one pass. Default (None) filters in one pass.
+		tile_size (int): Number of longitudes per tile when n_workers is given.
+		Any array with time along the last axis is accepted, e.g. the 2D data of OceanCells (tiles are then made of
+		ocean cells).
+
+	Returns:
+		tuple[np.ndarray, np.ndarray]: A tuple containing the filtered u-component data (serie_u_filt) and the
+		filtered v-component data (serie_v_filt), both as a 3D NumPy array.
+	"""
+
+	if n_workers is None:
+		return _filter_cube(data_u, filtering_freq), _filter_cube(data_v, filtering_freq)
+
+	serie_u_filt = np.empty_like(data_u)
+	serie_v_filt = np.empty_like(data_v)
+	# Spatial tiles along the first dimension
+	tiles = [slice(i, i + tile_size) for i in range(0, data_u.shape[0], tile_size)]
+	with ProcessPoolExecutor(max_workers = n_workers) as executor:
+		for data, serie_filt in [(data_u, serie_u_filt), (data_v, serie_v_filt)]:
+			filtered_tiles = executor.map(_filter_cube, (data[tile] for tile in tiles),
+			                              [filtering_freq] * len(tiles))
+			for tile, filtered_tile in zip(tiles, filtered_tiles):
+				serie_filt[tile] = filtered_tile
+
+	return serie_u_filt, serie_v_filt
+
+
+def filter_ocean_cells(cells_u: OceanCells, cells_v: OceanCells, filtering_freq=72, n_workers=None,
+                       tile_size=1024) -> tuple[OceanCells, OceanCells]:
+	"""
+	Filters the ocean cells only (see filter_data_batch). Land cells are never processed.
+
+	Args:
+		cells_u (OceanCells): u-component ocean time series.
+		cells_v (OceanCells): v-component ocean time series.
+		filtering_freq (float):  The cutoff frequency for the filter (in hours).
+		n_workers (int): Number of processes to filter tiles of ocean cells (default None, one pass).
+		tile_size (int): Number of ocean cells per tile when n_workers is given.
+
+	Returns:
+		tuple[OceanCells, OceanCells]: Filtered u and v components sharing the masks of the inputs.
+	"""
+	u_flt, v_flt = filter_data_batch(cells_u.data, cells_v.data, filtering_freq, n_workers, tile_size)
+	return cells_u.with_data(u_flt), cells_v.with_data(v_flt)
+
+
+def _filter_cube(data, filtering_freq):
+	"""
+	Applies butfilt along the last axis of data. NaNs are set to 0 before filtering and restored after.
+	"""
+	loc_nan = np.isnan(data)  # Find NaN locations
+	serie_filt = butfilt(filtering_freq, np.where(loc_nan, 0, data), 3600)  # hourly currents, hence, 3600s sampling
+	serie_filt[loc_nan] = np.nan  # Restore NaNs in the filtered data
+	return serie_filt
+
+
+def run_filtering(path2file=config.RAW_SURFACE_CURRENT, path2store=config.FILT_SURFACE_CURRENTS, filtering_freq=72,
+                  n_workers=None):
+	"""
+	Filters the IBI surface currents (ocean cells only) and saves them in a chunked HDF5 store (see
+	currents_store.py). The raw cube is not copied to the store.
+
+	Args:
+		path2file (str): Path of the IBI .mat file (u_ibi, v_ibi, lon_ibi, lat_ibi, time_ibi).
+		path2store (str): Path of the .h5 store to write.
+		filtering_freq (float):  The cutoff frequency for the filter (in hours).
+		n_workers (int): Number of processes used to filter (default None, one pass).
+	"""
+	IBI_data = load_mat(path2file, IBI_VARIABLES, squeeze_me = False)
+	print(f"The file '{path2file}' was imported successfully.")
+	# Keep ocean cells only
+	mask = ocean_mask(IBI_data['u_ibi'], IBI_data['v_ibi'])
+	u_flt, v_flt = filter_ocean_cells(OceanCells.from_grid(IBI_data['u_ibi'], mask),
+	                                  OceanCells.from_grid(IBI_data['v_ibi'], mask), filtering_freq, n_workers)
+	write_currents_store(path2store, mask, IBI_data['lon_ibi'], IBI_data['lat_ibi'], IBI_data['time_ibi'],
+	                     u_flt = u_flt.data, v_flt = v_flt.data)
+	print(f"The filtered currents were saved successfully in '{path2store}'.")
+
+
 if __name__ == '__main__':
 
-	path2file = r'../data/surface_currents/IBI_data.mat'
 	try:
-		IBI_data = scipy.io.loadmat(path2file)
-		print(f"The file '{path2file}' was imported successfully.")
-		u_flt, v_flt = filter_data(IBI_data['u_ibi'], IBI_data['v_ibi'])
-		IBI_data['u_flt'], IBI_data['v_flt'] = u_flt, v_flt
-		# Save the new data along the old one in a pickle file
-		with open(r'../../data/surface_currents/IBI_data_filt.pkl', 'wb') as f:
-			pickle.dump(IBI_data, f)
-			print(f"The variable was saved successfully.")
+		run_filtering()
 	except FileNotFoundError:
-		print(f"Error: The file '{path2file}' was not found.")
+		print(f"Error: The file '{config.RAW_SURFACE_CURRENT}' was not found.")
 	except Exception as e:
 		print(f"An error occurred while importing the file: {e}")
@@ -0,0 +1,65 @@
+import numpy as np
+
+"""
+Compact representation of the IBI grid keeping only the ocean cells. Land cells are all-NaN for the whole record and
+are dropped so that filtering and averaging only run on ocean time series.
+"""
+
+
+class OceanCells:
+	def __init__(self, mask, data):
+		"""
+		:param mask: 2D boolean array (longitude, latitude), True for ocean cells
+		:param data: 2D array (n_ocean_cells, time) holding the time series of the ocean cells, ordered as
+		np.nonzero(mask)
+		"""
+		if data.shape[0] != np.count_nonzero(mask):
+			raise ValueError("data must have one row per ocean cell of mask")
+		self.mask = mask
+		self.data = data
+
+	@classmethod
+	def from_grid(cls, cube, mask=None):
+		"""
+		:param cube: 3D array (longitude, latitude, time)
+		:param mask: ocean mask to use. Default (None) flags as land every cell that is NaN for the whole record
+		:return: OceanCells holding the ocean time series of cube
+		"""
+		if mask is None:
+			mask = ocean_mask(cube)
+		return cls(mask, cube[mask])
+
+	def with_data(self, data):
+		"""
+		:param data: 2D array (n_ocean_cells, time') computed from self.data (e.g. filtered or averaged)
+		:return: new OceanCells sharing the same mask
+		"""
+		return OceanCells(self.mask, data)
+
+	def to_grid(self, values=None):
+		"""
+		Scatters ocean values back onto the full grid, land cells being NaN.
+
+		:param values: array (n_ocean_cells, ...), e.g. a single day data[:, d]. Default (None) scatters self.data
+		:return: array (longitude, latitude, ...)
+		"""
+		if values is None:
+			values = self.data
+		grid = np.full(self.mask.shape + values.shape[1:], np.nan, dtype = np.result_type(values, np.float32))
+		grid[self.mask] = values
+		return grid
+
+	@property
+	def n_cells(self):
+		return self.data.shape[0]
+
+
+def ocean_mask(*cubes):
+	"""
+	:param cubes: 3D arrays (longitude, latitude, time) sharing the same grid (e.g. u_ibi and v_ibi)
+	:return: 2D boolean array, True for cells holding at least one value in any of the cubes
+	"""
+	mask = np.zeros(cubes[0].shape[:2], dtype = bool)
+	for cube in cubes:
+		mask |= ~np.all(np.isnan(cube), axis = -1)
+	return mask
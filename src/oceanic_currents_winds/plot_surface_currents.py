@@ -1,10 +1,20 @@
-import datetime
-import pickle
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import matplotlib.pyplot as plt
 
+from src import config
+from src.oceanic_currents_winds.currents_store import CurrentsStore
+
+# Longitude and latitude limits of the maps
+LONLIM = [-5, -1]
+LATLIM = [43, 45]
+
+# State of a map renderer (figure with its background and opened store), one per process. See render_daily_maps.
+_renderer = {}
+
 
 def plot_oceanic_currents(u, v, lons, lats, date):
 	"""
@@ -24,15 +34,39 @@ def plot_oceanic_currents(u, v, lons, lats, date):
 	# 2. Define the map projection (PlateCarree) - Changed from Mercator
 	ax = plt.axes(projection = ccrs.PlateCarree())
 
+	# 3. & 4. Set the extent and add land features to the plot
+	plot_map_background(ax)
+
+	# 8. to 10. Add the vector field, its scale and the title
+	plot_current_vectors(ax, u, v, lons, lats, date)
+
+
+def plot_map_background(ax):
+	"""
+	Draws the static part of the current maps (extent, land and coastline).
+
+	Args:
+		ax (cartopy.mpl.geoaxes.GeoAxes): PlateCarree axes to draw on.
+	"""
 	# 3. Set the extent of the plot (longitude and latitude limits)
-	lonlim = [-5, -1]
-	latlim = [43, 45]
-	ax.set_extent(lonlim + latlim, crs = ccrs.Geodetic())
+	ax.set_extent(LONLIM + LATLIM, crs = ccrs.Geodetic())
 
 	# 4. Add land features to the plot
 	ax.add_feature(cfeature.LAND, facecolor = 'lightgray')
 	ax.add_feature(cfeature.COASTLINE)
 
+
+def plot_current_vectors(ax, u, v, lons, lats, date):
+	"""
+	Draws the part of the current maps that changes every day (arrows, scale arrow and title).
+
+	Args:
+		ax (cartopy.mpl.geoaxes.GeoAxes): Axes with the background already drawn (see plot_map_background).
+		u, v, lons, lats, date: See plot_oceanic_currents.
+
+	Returns:
+		list: Artists added to ax, to be removed before drawing another day on the same background.
+	"""
 	# 8. Add the vector field plot (quiver) with scaled arrows
 	Q = ax.quiver(lons, lats, u, v,
 	              scale = 2 / 2.54,  # Adjust this scale factor for arrow length.  The reference unit is 0.5cm.
@@ -42,44 +76,89 @@ def plot_oceanic_currents(u, v, lons, lats, date):
 
 	# 9. Add a scale arrow
 	scale_value = 0.5  # m/s
-	x_scale = lonlim[1] - 0.4
-	y_scale = latlim[0] + 0.2
-	ax.quiverkey(Q, x_scale, y_scale, scale_value, f'{scale_value} m/s',
-	             labelpos = 'N', coordinates = 'data', color = 'k',
-	             fontproperties = {'size': 10})
+	x_scale = LONLIM[1] - 0.4
+	y_scale = LATLIM[0] + 0.2
+	key = ax.quiverkey(Q, x_scale, y_scale, scale_value, f'{scale_value} m/s',
+	                   labelpos = 'N', coordinates = 'data', color = 'k',
+	                   fontproperties = {'size': 10})
 
 	# 10. Add title with the date
-	plt.title(f'Surface Oceanic Current Velocities on {date.strftime("%d/%m/%Y")}, (72h low-passed and daily '
-	          f'averaged)')
+	ax.set_title(f'Surface Oceanic Current Velocities on {date.strftime("%d/%m/%Y")}, (72h low-passed and daily '
+	             f'averaged)')
+
+	return [Q, key]
+
 
+def render_daily_maps(path2avg=config.AVG_FILT_SURFACE_CURRENTS, save_dir=config.SURFACE_OCEANIC_CURRENTS_MAPS,
+                      n_workers=None):
+	"""
+	Plots and saves one map per day of the daily averaged currents store (see daily_averaging.py).
+	Each process draws the background once and reuses it (and its projected coastline) for every day it renders.
+	Days are read one at a time from the store so memory does not grow with the length of the record.
+
+	Args:
+		path2avg (str): Path of the daily averaged currents .h5 store.
+		save_dir (str): Directory where to save the maps.
+		n_workers (int): Number of processes rendering the days. Default (None) renders in the current process.
+
+	Returns:
+		list: Paths of the saved maps.
+	"""
+	os.makedirs(save_dir, exist_ok = True)
+	with CurrentsStore(path2avg) as store:
+		n_days = len(store)
+	print(f"Rendering {n_days} daily maps from '{path2avg}'.")
+
+	if n_workers is None:
+		_init_renderer(path2avg, save_dir)
+		try:
+			return [_render_day(d) for d in range(n_days)]
+		finally:
+			_close_renderer()
+
+	with ProcessPoolExecutor(max_workers = n_workers, initializer = _init_renderer,
+	                         initargs = (path2avg, save_dir)) as executor:
+		return list(executor.map(_render_day, range(n_days)))
+
+
+def _init_renderer(path2avg, save_dir):
+	"""
+	Opens the store and draws the background of the maps with a non-interactive backend.
+	"""
+	plt.switch_backend('Agg')
+	fig = plt.figure(figsize = (10, 8))
+	ax = plt.axes(projection = ccrs.PlateCarree())
+	plot_map_background(ax)
+	store = CurrentsStore(path2avg)
+	_renderer.update(fig = fig, ax = ax, store = store, dates = store.dates(), save_dir = save_dir)
 
-# 11. Display the plot
-plt.show()
+
+def _close_renderer():
+	_renderer['store'].close()
+	plt.close(_renderer['fig'])
+	_renderer.clear()
+
+
+def _render_day(d):
+	"""
+	Draws day d on the cached background, saves it and removes the day's artists.
+	"""
+	store, date = _renderer['store'], _renderer['dates'][d]
+	# Read a single day, scattered back onto the full grid
+	artists = plot_current_vectors(_renderer['ax'], store.grid('u_d_avg', d), store.grid('v_d_avg', d), store.lon,
+	                               store.lat, date)
+	path = os.path.join(_renderer['save_dir'], f'currents_{date.strftime("%Y%m%d")}.png')
+	_renderer['fig'].savefig(path, transparent = False, bbox_inches = 'tight')
+	for artist in artists:
+		artist.remove()
+	return path
 
 
 if __name__ == '__main__':
 	# Plot with IBI data from 2022
-	path2file = r'../data/surface_currents/IBI_data_filt_avg.pkl'
 	try:
-		with (open(path2file, 'rb') as f):
-			data2plot = pickle.load(f)
-			print(f"The file '{path2file}' was imported successfully.")
-			u = data2plot['u_d_avg']
-			v = data2plot['v_d_avg']
-			lons = data2plot['lon_ibi']
-			lats = data2plot['lat_ibi']
-			t = data2plot['t2']
-
-			# Plot
-			for d in range(len(t)):
-				plot_oceanic_currents(u[:, :, d], v[:, :, d], lons, lats, t[d])
-				# Save fig
-				plt.savefig(f'../plots/surface_oceanic_currents/currents_{t[d].strftime("%Y%m%d")}.png',
-				            transparent =
-				False, bbox_inches = 'tight')
-				plt.close()
-
+		render_daily_maps(n_workers = os.cpu_count())
 	except FileNotFoundError:
-		print(f"Error: The file '{path2file}' was not found.")
+		print(f"Error: The file '{config.AVG_FILT_SURFACE_CURRENTS}' was not found.")
 	except Exception as e:
 		print(f"An error occurred while importing the file: {e}")
@@ -0,0 +1,99 @@
+import numpy as np
+
+from src.core.datetime_formating import matlab2datetime64
+
+"""
+Averages surface oceanic current's velocity components over calendar days, 6-hour periods, tidal cycles or any
+user-defined period. Period labels are computed once from the MATLAB datenums and every component is reduced with
+NaN-aware bincount sums and counts.
+"""
+
+# Length of the predefined periods (in hours)
+PERIODS = {
+	'daily': 24,
+	'6-hourly': 6,
+	'tidal': 12.42,  # M2 tidal cycle
+}
+
+
+def period_labels(t, period='daily', origin=None):
+	"""
+	Assigns each timestamp to a period.
+
+	Args:
+		t (numpy.ndarray): 1D array of MATLAB datenums.
+		period (str or float): Key of PERIODS or length of the period in hours.
+		origin (float): MATLAB datenum at which the first period starts. Defaults to midnight of the first day.
+
+	Returns:
+		labels (numpy.ndarray): 1D int array, index of the period of each timestamp (0 to n_periods - 1).
+		starts (numpy.ndarray): 1D array of MATLAB datenums, start of each period holding at least one timestamp.
+	"""
+	t = np.atleast_1d(np.squeeze(np.asarray(t, dtype = float)))
+	hours = PERIODS[period] if isinstance(period, str) else float(period)
+	if hours <= 0:
+		raise ValueError(f"Invalid period: {period}")
+	if origin is None:
+		origin = np.floor(np.nanmin(t))  # Midnight of the first day
+
+	bins = np.floor((t - origin) * (24 / hours)).astype(np.int64)
+	unique_bins, labels = np.unique(bins, return_inverse = True)
+	starts = origin + unique_bins * hours / 24
+
+	return labels, starts
+
+
+def resample_components(t, *components, period='daily', origin=None, chunk_size=4096):
+	"""
+	Averages each component over the periods defined by period_labels, ignoring NaNs.
+
+	Args:
+		t (numpy.ndarray): 1D array of MATLAB datenums matching the last axis of the components.
+		*components (numpy.ndarray): Arrays with time along the last axis, e.g. u and v cubes
+			(longitude, latitude, time) or OceanCells data (n_ocean_cells, time).
+		period (str or float): Key of PERIODS or length of the period in hours.
+		origin (float): MATLAB datenum at which the first period starts. Defaults to midnight of the first day.
+		chunk_size (int): Number of time series reduced at once, bounds the memory used by the labels.
+
+	Returns:
+		averaged (list): One array per component, time axis replaced by the periods. Periods without any value
+			are NaN.
+		starts (numpy.ndarray): 1D array of MATLAB datenums, start of each period.
+	"""
+	labels, starts = period_labels(t, period, origin)
+	n_periods = len(starts)
+
+	averaged = []
+	for u in components:
+		if u.shape[-1] != len(labels):
+			raise ValueError("The last axis of each component must match the length of t")
+		series = u.reshape(-1, u.shape[-1])
+		u_averaged = np.empty((series.shape[0], n_periods), dtype = u.dtype)
+		for i in range(0, series.shape[0], chunk_size):
+			chunk = series[i:i + chunk_size]
+			valid = ~np.isnan(chunk)
+			# One label per (time series, period) pair
+			flat_labels = (np.arange(chunk.shape[0])[:, None] * n_periods + labels).ravel()
+			size = chunk.shape[0] * n_periods
+			sums = np.bincount(flat_labels, weights = np.where(valid, chunk, 0).ravel(), minlength = size)
+			counts = np.bincount(flat_labels, weights = valid.ravel(), minlength = size)
+			with np.errstate(invalid = 'ignore', divide = 'ignore'):
+				u_averaged[i:i + chunk_size] = (sums / counts).reshape(chunk.shape[0], n_periods)
+		averaged.append(u_averaged.reshape(u.shape[:-1] + (n_periods,)))
+
+	return averaged, starts
+
+
+def resample_current(u, v, t, period='daily', origin=None):
+	"""
+	Averages both components of the oceanic current over the given period.
+
+	Returns:
+		u_averaged, v_averaged (numpy.ndarray): Averaged components.
+		t2 (list): Start of each period, as datetime.date for daily averages and datetime.datetime otherwise.
+	"""
+	(u_averaged, v_averaged), starts = resample_components(t, u, v, period = period, origin = origin)
+	t2 = matlab2datetime64(starts)
+	if period == 'daily' and origin is None:
+		return u_averaged, v_averaged, t2.astype('datetime64[D]').tolist()
+	return u_averaged, v_averaged, t2.astype('datetime64[us]').tolist()
@@ -0,0 +1,159 @@
+import numpy as np
+from scipy.signal import welch
+
+from src import config
+from src.core.mat_io import load_mat
+from src.oceanic_currents_winds.ocean_cells import OceanCells, ocean_mask
+
+"""
+Batched spectral diagnostics of the hourly IBI surface currents (Welch PSD and rotary spectra) for every ocean cell,
+used to check which bands (storm, inertial, tidal) the 72h low-pass filter of filtering.py removes.
+Frequencies are in cycles per hour (cph).
+"""
+
+OMEGA = 7.2921e-5  # Earth's rotation rate (rad/s)
+
+# Frequency bands (cph). 'inertial' is defined per cell from its latitude, see inertial_frequency.
+SPECTRAL_BANDS = {
+	'low_pass_72h': (0, 1 / 72),  # Kept by filtering.py
+	'storm': (1 / 240, 1 / 48),  # 2 to 10 days
+	'inertial': (0.9, 1.1),  # Fraction of the local inertial frequency
+	'diurnal': (1 / 26, 1 / 22),  # K1, O1
+	'semidiurnal': (1 / 13, 1 / 11.5),  # M2, S2
+}
+
+
+def inertial_frequency(lat):
+	"""
+	:param lat: latitudes (degrees)
+	:return: inertial frequency (cph)
+	"""
+	return 2 * OMEGA * np.abs(np.sin(np.deg2rad(lat))) * 3600 / (2 * np.pi)
+
+
+def welch_spectra(data, fs=1.0, nperseg=256):
+	"""
+	Welch power spectral density of every time series of data at once.
+
+	:param data: array (n_cells, time), e.g. OceanCells data. NaNs are replaced by the mean of their series
+	:param fs: sampling frequency (cph, 1 for hourly currents)
+	:param nperseg: length of the Welch segments (hours)
+	:return: freqs (cph) and psd (n_cells, n_freqs)
+	"""
+	return welch(_fill_nan(data), fs = fs, nperseg = min(nperseg, data.shape[-1]), axis = -1)
+
+
+def rotary_spectra(u, v, fs=1.0, nperseg=256):
+	"""
+	Rotary spectra of the current vectors u + iv of every time series at once.
+
+	:param u: array (n_cells, time) of the u-component
+	:param v: array (n_cells, time) of the v-component
+	:param fs: sampling frequency (cph, 1 for hourly currents)
+	:param nperseg: length of the Welch segments (hours)
+	:return: freqs (cph, >= 0), psd_cw (clockwise, e.g. inertial oscillations in the northern hemisphere) and psd_ccw
+	(counterclockwise), both (n_cells, n_freqs)
+	"""
+	w = _fill_nan(u) + 1j * _fill_nan(v)
+	freqs, psd = welch(w, fs = fs, nperseg = min(nperseg, w.shape[-1]), return_onesided = False, axis = -1)
+	freqs, psd = np.fft.fftshift(freqs), np.fft.fftshift(psd, axes = -1)
+	positive = freqs >= 0
+	# Clockwise motions are at negative frequencies, mirrored onto the positive ones
+	mirror = np.searchsorted(freqs, -freqs[positive])
+	psd_ccw, psd_cw = psd[:, positive], psd[:, mirror]
+	return freqs[positive], psd_cw, psd_ccw
+
+
+def band_energy(freqs, psd, bands=None, lat=None):
+	"""
+	Integrates spectra over frequency bands.
+
+	:param freqs: frequencies (cph)
+	:param psd: array (n_cells, n_freqs)
+	:param bands: dict {name: (f_min, f_max)} in cph. Defaults to SPECTRAL_BANDS
+	:param lat: latitude of each cell (n_cells,), needed for the 'inertial' band
+	:return: dict {name: energy (n_cells,)}
+	"""
+	bands = SPECTRAL_BANDS if bands is None else bands
+	df = freqs[1] - freqs[0]
+	energy = {}
+	for name, (f_min, f_max) in bands.items():
+		if name == 'inertial':
+			if lat is None:
+				raise ValueError("lat is needed for the inertial band")
+			f = inertial_frequency(np.asarray(lat))[:, None]
+			in_band = (freqs >= f_min * f) & (freqs <= f_max * f)
+		else:
+			in_band = (freqs >= f_min) & (freqs <= f_max)
+		energy[name] = np.sum(psd * in_band, axis = -1) * df
+	return energy
+
+
+def band_energy_maps(cells_u: OceanCells, cells_v: OceanCells, lat, bands=None, nperseg=256, chunk_size=2048):
+	"""
+	Band-integrated rotary spectra of every ocean cell, computed by chunks of cells to bound memory.
+
+	:param cells_u: u-component ocean time series (hourly)
+	:param cells_v: v-component ocean time series (hourly)
+	:param lat: latitudes of the grid, 2D (longitude, latitude) or 1D (latitude)
+	:param bands: dict {name: (f_min, f_max)} in cph. Defaults to SPECTRAL_BANDS
+	:param nperseg: length of the Welch segments (hours)
+	:param chunk_size: number of ocean cells processed at once
+	:return: dict {name: {'clockwise': map, 'counterclockwise': map, 'total': map}}, maps being 2D (longitude, latitude)
+	"""
+	bands = SPECTRAL_BANDS if bands is None else bands
+	cell_lat = cell_latitudes(cells_u.mask, lat)
+	energy = {name: {'clockwise': np.empty(cells_u.n_cells), 'counterclockwise': np.empty(cells_u.n_cells)} for name
+	          in bands}
+	for i in range(0, cells_u.n_cells, chunk_size):
+		chunk = slice(i, i + chunk_size)
+		freqs, psd_cw, psd_ccw = rotary_spectra(cells_u.data[chunk], cells_v.data[chunk], nperseg = nperseg)
+		for rotation, psd in [('clockwise', psd_cw), ('counterclockwise', psd_ccw)]:
+			for name, e in band_energy(freqs, psd, bands, cell_lat[chunk]).items():
+				energy[name][rotation][chunk] = e
+
+	maps = {}
+	for name, e in energy.items():
+		maps[name] = {rotation: cells_u.to_grid(values) for rotation, values in e.items()}
+		maps[name]['total'] = maps[name]['clockwise'] + maps[name]['counterclockwise']
+	return maps
+
+
+def cell_latitudes(mask, lat):
+	"""
+	:param mask: ocean mask (longitude, latitude)
+	:param lat: latitudes of the grid, 2D (longitude, latitude) or 1D (latitude)
+	:return: latitude of each ocean cell (n_ocean_cells,)
+	"""
+	lat = np.squeeze(lat)
+	if lat.ndim == 1:
+		lat = np.broadcast_to(lat, mask.shape)
+	return lat[mask]
+
+
+def _fill_nan(data):
+	"""
+	:return: copy of data with the NaNs of each series replaced by the mean of the series (0 for all-NaN series)
+	"""
+	mean = np.nanmean(np.where(np.all(np.isnan(data), axis = -1, keepdims = True), 0, data), axis = -1,
+	                  keepdims = True)
+	return np.where(np.isnan(data), mean, data)
+
+
+if __name__ == '__main__':
+	path2file = config.RAW_SURFACE_CURRENT
+	try:
+		IBI_data = load_mat(path2file, ['u_ibi', 'v_ibi', 'lat_ibi'], squeeze_me = False)
+		print(f"The file '{path2file}' was imported successfully.")
+		mask = ocean_mask(IBI_data['u_ibi'], IBI_data['v_ibi'])
+		maps = band_energy_maps(OceanCells.from_grid(IBI_data['u_ibi'], mask),
+		                        OceanCells.from_grid(IBI_data['v_ibi'], mask), IBI_data['lat_ibi'])
+		# Energy of each band (domain average)
+		for name, band_maps in maps.items():
+			print(f"{name}: {np.nanmean(band_maps['total']):.2e} (m/s)^2, "
+			      f"clockwise {np.nanmean(band_maps['clockwise']):.2e}, "
+			      f"counterclockwise {np.nanmean(band_maps['counterclockwise']):.2e}")
+	except FileNotFoundError:
+		print(f"Error: The file '{path2file}' was not found.")
+	except Exception as e:
+		print(f"An error occurred while importing the file: {e}")
@@ -1,3 +1,6 @@
+import hashlib
+import io
+import os
 from datetime import datetime
 
 import matplotlib.dates as mdates
@@ -5,9 +8,14 @@ import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from src import config
 
+# Size of the quiver figure (inches)
+QUIVER_FIGSIZE = (15, 12)
+
 
 def load_and_clean_data(file_path: str) -> pd.DataFrame:
 	"""
@@ -23,22 +31,35 @@ def load_and_clean_data(file_path: str) -> pd.DataFrame:
 	# Load the dataset, skipping the first row and using the second row as header
 	df = pd.read_csv(file_path, sep = '\t', header = 1)
 
+	return clean_buoy_data(df)
+
+
+def clean_buoy_data(df: pd.DataFrame) -> pd.DataFrame:
+	"""
+	Cleans raw buoy rows (as read from the tab-separated CSV file).
+
+	Args:
+		df (pd.DataFrame): Raw buoy rows with the original (Spanish) column names.
+
+	Returns:
+		pd.DataFrame: The cleaned and preprocessed DataFrame.
+	"""
 	# Rename columns for better readability
-	df.rename(columns = {
+	df = df.rename(columns = {
 		'Fecha (GMT)': 'Timestamp',
 		'Velocidad media de Corriente(cm/s)': 'current_speed_cm_s',
 		'Dir. de prop. de la Corriente(0=N,90=E)': 'current_direction',
 		'Velocidad media del viento(m/s)': 'wind_speed_m_s',
 		'Direc. de proced. del Viento(0=N,90=E)': 'wind_direction'
-	}, inplace = True)
+	})
 
 	# Select only columns of interest
-	df = df[['Timestamp', 'current_speed_cm_s', 'current_direction', 'wind_speed_m_s', 'wind_direction']]
+	df = df[['Timestamp', 'current_speed_cm_s', 'current_direction', 'wind_speed_m_s', 'wind_direction']].copy()
 
 	# Replace non-numeric placeholders with NaN and convert to numeric.
 	# errors='coerce' will turn any non-convertible values into NaN.
 	for col in ['current_speed_cm_s', 'current_direction', 'wind_speed_m_s', 'wind_direction']:
-		df[col] = pd.to_numeric(df[col], errors = 'coerce')
+		df[col] = pd.to_numeric(df[col], errors = 'coerce').astype(float)
 		# Replace the specific value -9999.9 by NaN
 		df[col] = df[col].replace(-9999.9, np.nan)
 
@@ -60,6 +81,117 @@ def load_and_clean_data(file_path: str) -> pd.DataFrame:
 	return df
 
 
+def load_buoy_data(file_path: str = config.RAW_BUOY_DATA, cache_path: str = config.BUOY_DATA_CACHE) -> pd.DataFrame:
+	"""
+	Same as load_and_clean_data but keeps a cleaned copy of the buoy record in a Parquet file (typed columns,
+	datetime64 timestamps). The cache remembers how many bytes of the raw CSV it holds, so when new rows are appended
+	to the CSV only these rows (after the last cached timestamp) are parsed and appended to the cache.
+	The cache is rebuilt from scratch if the CSV was replaced (smaller file, different header or different cached
+	lines, see _prefix_fingerprint).
+
+	Args:
+		file_path (str): The path to the raw data CSV file.
+		cache_path (str): The path to the Parquet cache.
+
+	Returns:
+		pd.DataFrame: The cleaned and preprocessed DataFrame.
+	"""
+	with open(file_path, 'rb') as f:
+		title, header = f.readline(), f.readline()
+		header_offset = f.tell()
+		cached, metadata = _read_buoy_cache(cache_path)
+		offset = int(metadata.get(b'source_offset', 0))
+		# Rebuild the cache if the raw file does not extend the cached one
+		if (cached is None or metadata.get(b'source_header') != header or offset > os.fstat(f.fileno()).st_size or
+				metadata.get(b'source_fingerprint') != _prefix_fingerprint(f, header_offset, offset).encode()):
+			cached, offset = None, header_offset
+		f.seek(offset)
+		new_lines = f.read()
+		# Fingerprint of the raw file up to the end of the complete lines, i.e. of the part held by the new cache
+		new_offset = offset + new_lines.rfind(b'\n') + 1
+		fingerprint = _prefix_fingerprint(f, header_offset, new_offset)
+
+	# Only cache complete lines: the last one might still be being written (it is re-read next time)
+	complete = new_lines[:new_lines.rfind(b'\n') + 1]
+	tail = new_lines[len(complete):]
+	columns = pd.read_csv(io.BytesIO(title + header), sep = '\t', header = 1).columns
+
+	if complete or cached is None:
+		new_rows = _parse_buoy_lines(complete, columns)
+		if cached is not None and len(cached):
+			new_rows = new_rows[new_rows['Timestamp'] > cached['Timestamp'].max()]
+			df = pd.concat([cached, new_rows], ignore_index = True)
+		else:
+			df = new_rows.reset_index(drop = True)
+		_write_buoy_cache(df, cache_path, header, offset + len(complete), fingerprint)
+	else:
+		df = cached
+
+	# A finished export may not end with a newline: its last row is returned but not cached
+	if tail.strip():
+		last_rows = _parse_buoy_lines(tail, columns)
+		if len(df):
+			last_rows = last_rows[last_rows['Timestamp'] > df['Timestamp'].max()]
+		df = pd.concat([df, last_rows], ignore_index = True) if len(df) else last_rows.reset_index(drop = True)
+
+	return df
+
+
+def _parse_buoy_lines(lines: bytes, columns) -> pd.DataFrame:
+	"""
+	:return: cleaned DataFrame of raw buoy lines (without title and header)
+	"""
+	raw = pd.read_csv(io.BytesIO(lines), sep = '\t', header = None, names = columns) if lines.strip() else \
+		pd.DataFrame(columns = columns)
+	return clean_buoy_data(raw)
+
+
+def _prefix_fingerprint(f, start: int, stop: int, block_size: int = 4096) -> str:
+	"""
+	Fingerprint of the rows held by the cache, bytes start:stop of the raw file: hash of their first and last blocks.
+	A replaced export (same header, not shorter) has different first or last cached rows and is rebuilt.
+
+	Args:
+		f: The raw file, opened in binary mode (its position is changed).
+		start (int): Offset of the first row (after the header).
+		stop (int): Offset of the end of the last cached row.
+
+	Returns:
+		str: The fingerprint.
+	"""
+	h = hashlib.sha1()
+	f.seek(start)
+	h.update(f.read(max(0, min(block_size, stop - start))))
+	f.seek(max(start, stop - block_size))
+	h.update(f.read(max(0, stop - max(start, stop - block_size))))
+	return h.hexdigest()
+
+
+def _write_buoy_cache(df: pd.DataFrame, cache_path: str, header: bytes, offset: int, fingerprint: str):
+	"""
+	Saves the cache with the position reached in the raw file (through a temporary file, so that an interrupted write
+	never leaves a corrupted cache).
+	"""
+	table = pa.Table.from_pandas(df, preserve_index = False)
+	table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'source_header': header,
+	                                       b'source_offset': str(offset).encode(),
+	                                       b'source_fingerprint': fingerprint.encode()})
+	os.makedirs(os.path.dirname(cache_path), exist_ok = True)
+	tmp_path = cache_path + '.tmp'
+	pq.write_table(table, tmp_path)
+	os.replace(tmp_path, cache_path)
+
+
+def _read_buoy_cache(cache_path: str):
+	"""
+	:return: cached DataFrame and Parquet metadata, (None, {}) if there is no cache
+	"""
+	if not os.path.exists(cache_path):
+		return None, {}
+	table = pq.read_table(cache_path)
+	return table.to_pandas(), table.schema.metadata or {}
+
+
 def calculate_vector_components(df: pd.DataFrame) -> pd.DataFrame:
 	"""
 	Calculates the U and V components for wind and current.
@@ -90,7 +222,36 @@ def calculate_vector_components(df: pd.DataFrame) -> pd.DataFrame:
 	return df
 
 
-def plot_quiver_data(df: pd.DataFrame, save_path: str, dpi: int, sample_interval: int):
+def decimate_vectors(df: pd.DataFrame, bin_width=None, fig_width_in: float = QUIVER_FIGSIZE[0],
+                     arrows_per_inch: float = 8) -> pd.DataFrame:
+	"""
+	Averages the U and V components of wind and current into fixed time bins, so that long records can be plotted
+	with a readable number of arrows without dropping (and aliasing) data.
+
+	Args:
+		df (pd.DataFrame): The DataFrame returned by calculate_vector_components.
+		bin_width (str or pd.Timedelta): Width of the time bins (e.g. '6h'). Default (None) chooses the smallest whole
+			number of hours giving at most fig_width_in * arrows_per_inch arrows.
+		fig_width_in (float): Width of the figure (inches), used when bin_width is None.
+		arrows_per_inch (float): Arrow density, used when bin_width is None.
+
+	Returns:
+		pd.DataFrame: One row per non-empty bin with the averaged components. 'Timestamp' is the centre of the bin.
+	"""
+	if bin_width is None:
+		span = df['Timestamp'].max() - df['Timestamp'].min()
+		n_arrows = max(int(fig_width_in * arrows_per_inch), 1)
+		bin_width = max((span / n_arrows).ceil('h'), pd.Timedelta(hours = 1))
+	bin_width = pd.Timedelta(bin_width)
+
+	components = ['wind_u', 'wind_v', 'current_u', 'current_v']
+	df_binned = df.set_index('Timestamp')[components].resample(bin_width).mean().dropna(how = 'all')
+	df_binned.index = df_binned.index + bin_width / 2
+
+	return df_binned.reset_index()
+
+
+def plot_quiver_data(df: pd.DataFrame, save_path: str, dpi: int, sample_interval: int = 1):
 	"""
 	Plots wind and current vectors using quiver plots.
 
@@ -99,6 +260,7 @@ def plot_quiver_data(df: pd.DataFrame, save_path: str, dpi: int, sample_interval
 		save_path (str): The path to save the figure.
 		dpi (int): The resolution (dots per inch) of the saved figure.
 		sample_interval (int): Interval to sample data for plotting. A value of 1 means no sampling (plot all).
+			Prefer decimate_vectors, which averages the vectors instead of dropping them.
 	"""
 	# print(f"Creating quiver plot and saving to: {save_path}")
 
@@ -106,7 +268,7 @@ def plot_quiver_data(df: pd.DataFrame, save_path: str, dpi: int, sample_interval
 	df_sampled = df.iloc[::sample_interval, :]
 
 	# Create the figure and subplots
-	fig, (ax1, ax2) = plt.subplots(2, 1, figsize = (15, 12))
+	fig, (ax1, ax2) = plt.subplots(2, 1, figsize = QUIVER_FIGSIZE)
 	# Plot wind vectors in the top subplot
 	# Q1 is the Quiver object to allow adding a scale key
 	Q1 = ax1.quiver(df_sampled['Timestamp'], np.zeros(len(df_sampled)), df_sampled['wind_u'], df_sampled['wind_v'],
@@ -178,16 +340,18 @@ def main():
 	"""
 	# print("Starting wind and current data analysis.")
 
-	# 1. Load and clean the data using the path from config
-	df = load_and_clean_data(config.RAW_BUOY_DATA)
+	# 1. Load and clean the data using the path from config (only new rows of the CSV are parsed, see load_buoy_data)
+	df = load_buoy_data(config.RAW_BUOY_DATA, config.BUOY_DATA_CACHE)
 
 	# 2. Calculate vector components
 	df = calculate_vector_components(df)
 
-	# 3. Plot the data and save the figure using paths and DPI from config
-	# Adjust sample_interval to plot fewer arrows. For example, sample_interval=2 will plot every other arrow.
-	# sample_interval=5 will plot every 5th arrow.
-	plot_quiver_data(df, config.BUOY_QUIVER, config.DEFAULT_PLOT_DPI, sample_interval = 3)
+	# 3. Average the vectors in time bins matching the width of the figure
+	# Pass bin_width (e.g. '3h') to choose the bins yourself.
+	df_binned = decimate_vectors(df)
+
+	# 4. Plot the data and save the figure using paths and DPI from config
+	plot_quiver_data(df_binned, config.BUOY_QUIVER, config.DEFAULT_PLOT_DPI)
 
 
 # print("Wind and current data analysis completed.")
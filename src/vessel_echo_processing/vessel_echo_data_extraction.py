@@ -4,7 +4,7 @@ import pickle
 import pandas as pd
 
 from src import config
-from src.core.datetime_formating import combine_date_time
+from src.core.datetime_formating import combine_date_time_array
 
 
 def extract_vessel_echo_data(file, saving_path):
@@ -14,9 +14,9 @@ def extract_vessel_echo_data(file, saving_path):
 	:return: list [longitudes,latitudes,time_stamps] (i.e., args for plot_vessel_transect class)
 	"""
 	df = pd.read_csv(file)
-	vessel_mat = [df['Lon_M'].tolist(), df['Lat_M'].tolist(), df['Date_M'].tolist(), df['Time_M'].tolist()]
-	vessel_mat[2] = combine_date_time(vessel_mat[2], vessel_mat[3])
-	vessel_mat.pop(3)
+	# Time stamps are stored as a list of datetime objects
+	time_stamps = combine_date_time_array(df['Date_M'], df['Time_M']).astype('datetime64[us]').tolist()
+	vessel_mat = [df['Lon_M'].tolist(), df['Lat_M'].tolist(), time_stamps]
 
 	# Save the matrix to an extraction_file
 	with open(os.path.join(saving_path, file[-30:-20] + '.pkl'), 'wb') as f:
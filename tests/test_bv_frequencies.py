@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.BV_ferq.bv_frequencies import bin_depth_average, depth_bin_edges
+
+
+def former_bv_freq_avg_every_k_meters(n, depth, k=5):
+	"""
+	bv_freq_avg_every_k_meters before the binning was vectorized (index-based bins).
+	"""
+	depth_avg = [[] for _ in range(210 // k)]
+	bv_mean = []
+	n = n.copy()
+	for i in range(1, 210, k):
+		n_slice = n[:, i:i + k]
+		n_slice[np.all(np.isnan(n_slice), axis = 1)] = -999
+		bv_mean.append(np.nanmean(n_slice, axis = 1))
+		n_slice[n_slice == -999] = np.nan
+		depth_avg[i // k] = np.nanmean(depth[i:i + k])
+	bv_mean = np.array(bv_mean)
+	bv_mean[bv_mean == -999] = np.nan
+	return bv_mean, np.array(depth_avg)
+
+
+def test_default_bin_edges_start_at_top_of_profile():
+	depth = -np.arange(23.0)
+	np.testing.assert_array_equal(depth_bin_edges(depth, 5), [0, -5, -10, -15, -20, -25])
+	np.testing.assert_array_equal(depth_bin_edges(-depth, 5), [0, 5, 10, 15, 20, 25])
+
+
+def test_default_bins_with_partial_last_bin():
+	depth = -np.arange(23.0)
+	n = np.tile(np.arange(23.0), (2, 1))  # Value of each column = its index
+	bv_mean, depth_avg = bin_depth_average(n, depth, bin_width = 5)
+	np.testing.assert_array_equal(depth_avg, [-2, -7, -12, -17, -21])
+	np.testing.assert_array_equal(bv_mean[:, 0], [2, 7, 12, 17, 21])
+
+
+def test_former_bins_from_bin_edges():
+	rng = np.random.default_rng(0)
+	depth = -np.arange(300.0)
+	n = rng.random((4, 299))
+	n[n < 0.2] = np.nan
+	n[1, 10:20] = np.nan  # Full NaN bins
+	edges = (depth[0:211:5] + depth[1:212:5]) / 2
+	bv_mean, depth_avg = bin_depth_average(n, depth, bin_edges = edges)
+	expected_mean, expected_depth = former_bv_freq_avg_every_k_meters(n, depth)
+	np.testing.assert_allclose(bv_mean, expected_mean)
+	np.testing.assert_allclose(depth_avg, expected_depth)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.BV_ferq.bv_frequencies import bin_depth_average, bv_freq_from_n2, bv_sum_top_k_meters
+from src.BV_ferq.bv_online import OnlineBV
+from src.glider_processing.ctd_derived import compute_derived
+
+
+def synthetic_profiles(n_profiles=41, n_levels=60, seed=0):
+	rng = np.random.default_rng(seed)
+	depth = np.arange(n_levels, dtype = float)
+	pressure = np.tile(depth, (n_profiles, 1))
+	salinity = 35 + np.cumsum(rng.random((n_profiles, n_levels)) * 0.01, axis = 1)
+	temp = 20 - np.cumsum(rng.random((n_profiles, n_levels)) * 0.1, axis = 1)
+	lon, lat = -2 + rng.random(n_profiles), 44 + rng.random(n_profiles)
+	date = np.datetime64('2022-09-23') + np.arange(n_profiles) * np.timedelta64(20, 'm')
+	return depth, salinity, temp, pressure, lon, lat, date
+
+
+def test_incremental_batches_match_batch_computation():
+	depth, salinity, temp, pressure, lon, lat, date = synthetic_profiles()
+	online_bv = OnlineBV(depth, top_k = 30)
+	for batch in (slice(0, 10), slice(10, 25), slice(0, 40), slice(40, 41)):  # Overlapping feed included
+		online_bv.append_profiles(salinity[batch], temp[batch], pressure[batch], lon[batch], lat[batch], date[batch])
+
+	n = bv_freq_from_n2(compute_derived(salinity, temp, pressure, lon, lat)['N2'])
+	bv_mean, depth_avg = bin_depth_average(n, depth, bin_edges = online_bv.bin_edges)
+	np.testing.assert_array_equal(online_bv.date, date)
+	np.testing.assert_allclose(online_bv.n, n)
+	np.testing.assert_allclose(online_bv.bv_mean, bv_mean)
+	np.testing.assert_allclose(online_bv.depth_avg, depth_avg)
+	np.testing.assert_allclose(online_bv.sBV, bv_sum_top_k_meters(n, 30))
+
+
+def test_save_to_bare_file_name(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	depth, salinity, temp, pressure, lon, lat, date = synthetic_profiles(5)
+	online_bv = OnlineBV(depth)
+	online_bv.append_profiles(salinity, temp, pressure, lon, lat, date)
+	online_bv.save('bv_state.npz')
+
+	loaded = OnlineBV.load('bv_state.npz')
+	np.testing.assert_array_equal(loaded.date, online_bv.date)
+	np.testing.assert_allclose(loaded.sBV, online_bv.sBV)
@@ -0,0 +1,80 @@
+import h5py
+import numpy as np
+import pytest
+import scipy.io as sio
+
+from src.core.mat_io import is_mat_v73, load_mat, mat_variables
+
+VARIABLES = {
+	'matrix': np.arange(35, dtype = float).reshape(5, 7),
+	'column': np.arange(5, dtype = float).reshape(5, 1),
+	'row': np.arange(5, dtype = float).reshape(1, 5),
+	'scalar': np.array([[3.0]]),
+	'cube': np.arange(12, dtype = float).reshape(4, 1, 3),
+	'single_row': np.arange(7, dtype = float).reshape(1, 7),
+}
+ROWS = [None, slice(1, 3), slice(2, 3), slice(4, None), 2, np.array([0, 3])]
+
+
+def save_v73(path, variables):
+	"""
+	Writes variables as MATLAB v7.3 does: HDF5 datasets, transposed, with their MATLAB class.
+	"""
+	with h5py.File(path, 'w') as f:
+		for name, value in variables.items():
+			f.create_dataset(name, data = value.T)
+			f[name].attrs['MATLAB_class'] = np.bytes_('double')
+
+
+@pytest.fixture
+def mat_files(tmp_path):
+	v7, v73 = str(tmp_path / 'v7.mat'), str(tmp_path / 'v73.mat')
+	sio.savemat(v7, VARIABLES)
+	save_v73(v73, VARIABLES)
+	return v7, v73
+
+
+def test_versions(mat_files):
+	v7, v73 = mat_files
+	assert not is_mat_v73(v7) and is_mat_v73(v73)
+	assert sorted(mat_variables(v7)) == sorted(mat_variables(v73)) == sorted(VARIABLES)
+
+
+@pytest.mark.parametrize('squeeze_me', [True, False])
+@pytest.mark.parametrize('rows', ROWS, ids = repr)
+def test_v7_and_v73_rows_match(mat_files, rows, squeeze_me):
+	v7, v73 = mat_files
+	names = ['matrix', 'column', 'row', 'scalar', 'cube']
+	if not squeeze_me:
+		names = ['matrix', 'column', 'cube']  # Rows along the first MATLAB axis, of length 1 for row and scalar
+	data_v7 = load_mat(v7, names, rows = rows, squeeze_me = squeeze_me)
+	data_v73 = load_mat(v73, names, rows = rows, squeeze_me = squeeze_me)
+	for name in names:
+		expected = np.asarray(data_v7[name])
+		actual = np.asarray(data_v73[name])
+		assert actual.shape == expected.shape, name
+		np.testing.assert_array_equal(actual, expected)
+
+
+def test_length_one_selection_keeps_its_axis(mat_files):
+	for path in mat_files:
+		data = load_mat(path, ['matrix', 'column'], rows = slice(4, 5))
+		assert data['matrix'].shape == (1, 7)
+		assert data['column'].shape == (1,)
+		data = load_mat(path, ['matrix', 'column'], rows = 4)
+		assert data['matrix'].shape == (7,)
+		assert data['column'].shape == ()
+
+
+def test_single_row_variable_is_squeezed(mat_files):
+	# One profile in the whole file: squeezed to a vector whose rows are its elements, as loadmat
+	for path in mat_files:
+		assert load_mat(path, 'single_row')['single_row'].shape == (7,)
+		assert load_mat(path, 'single_row', rows = slice(0, 2))['single_row'].shape == (2,)
+
+
+def test_rows_per_variable(mat_files):
+	for path in mat_files:
+		data = load_mat(path, ['matrix', 'column'], rows = {'matrix': slice(0, 2)})
+		assert data['matrix'].shape == (2, 7)
+		assert data['column'].shape == (5,)
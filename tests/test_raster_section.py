@@ -0,0 +1,45 @@
+import sys
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from src.core.raster_section import plot_raster_section
+
+
+def test_numpy_contour_levels_including_zero():
+	x, y = np.arange(50), np.linspace(-10, 10, 40)
+	z = np.tile(y[:, np.newaxis], (1, len(x)))
+	fig, ax = plt.subplots()
+	try:
+		plot_raster_section(ax, x, y, z, contour_levels = np.array([0.0]))
+		assert len(ax.collections) == 2  # Mesh and contour at 0
+	finally:
+		plt.close(fig)
+
+
+def test_no_contours_for_empty_levels():
+	fig, ax = plt.subplots()
+	try:
+		plot_raster_section(ax, np.arange(5), np.arange(4), np.zeros((4, 5)), contour_levels = [])
+		assert len(ax.collections) == 1
+	finally:
+		plt.close(fig)
+
+
+def test_decimated_to_max_pixels():
+	fig, ax = plt.subplots()
+	try:
+		mesh = plot_raster_section(ax, np.arange(1000), np.arange(300), np.random.rand(300, 1000),
+		                           max_pixels = (100, 30))
+		assert mesh.get_array().shape == (30, 100)
+	finally:
+		plt.close(fig)
+
+
+def test_section_modules_do_not_need_rasterio():
+	import src.BV_ferq.bv_frequencies
+	import src.CTD_WIP.CTD_profile
+	assert 'rasterio' not in sys.modules
@@ -0,0 +1,55 @@
+from src.oceanic_currents_winds.wind_currents_quiver import load_and_clean_data, load_buoy_data
+
+TITLE = "Boya de Bilbao-Vizcaya\n"
+HEADER = ("Fecha (GMT)\tVelocidad media de Corriente(cm/s)\tDir. de prop. de la Corriente(0=N,90=E)\t"
+          "Velocidad media del viento(m/s)\tDirec. de proced. del Viento(0=N,90=E)\n")
+
+
+def buoy_rows(n, start_hour=0, speed=10):
+	return [f"2022 09 23 {h:02d}\t{speed + h}\t90\t5\t180\n" for h in range(start_hour, start_hour + n)]
+
+
+def test_empty_cache_then_append(tmp_path):
+	csv, cache = tmp_path / "buoy.csv", tmp_path / "buoy.parquet"
+	csv.write_text(TITLE + HEADER)
+	assert len(load_buoy_data(str(csv), str(cache))) == 0
+
+	with open(csv, "a") as f:
+		f.writelines(buoy_rows(3))
+	assert len(load_buoy_data(str(csv), str(cache))) == 3
+	assert len(load_buoy_data(str(csv), str(cache))) == 3
+
+
+def test_cleaned_out_rows_then_append(tmp_path):
+	csv, cache = tmp_path / "buoy.csv", tmp_path / "buoy.parquet"
+	csv.write_text(TITLE + HEADER + "2022 09 23 00\t-9999.9\t90\t5\t180\n")
+	assert len(load_buoy_data(str(csv), str(cache))) == 0
+
+	with open(csv, "a") as f:
+		f.writelines(buoy_rows(2, start_hour = 1))
+	assert len(load_buoy_data(str(csv), str(cache))) == 2
+
+
+def test_append_and_unterminated_last_row(tmp_path):
+	csv, cache = tmp_path / "buoy.csv", tmp_path / "buoy.parquet"
+	rows = buoy_rows(5)
+	csv.write_text(TITLE + HEADER + "".join(rows[:2]))
+	assert len(load_buoy_data(str(csv), str(cache))) == 2
+
+	with open(csv, "a") as f:
+		f.write("".join(rows[2:]).rstrip("\n"))
+	df = load_buoy_data(str(csv), str(cache))
+	assert df.equals(load_and_clean_data(str(csv)).reset_index(drop = True))
+	assert len(load_buoy_data(str(csv), str(cache))) == 5
+
+
+def test_replaced_export_is_rebuilt(tmp_path):
+	csv, cache = tmp_path / "buoy.csv", tmp_path / "buoy.parquet"
+	csv.write_text(TITLE + HEADER + "".join(buoy_rows(3)))
+	load_buoy_data(str(csv), str(cache))
+
+	# Same header, longer file, different values
+	csv.write_text(TITLE + HEADER + "".join(buoy_rows(4, speed = 50)))
+	df = load_buoy_data(str(csv), str(cache))
+	assert df.equals(load_and_clean_data(str(csv)).reset_index(drop = True))
+	assert df['current_speed_cm_s'].tolist() == [50, 51, 52, 53]